@@ -24,34 +24,42 @@ def main() -> int:
     except Exception:
         pre = 0
 
-    # Send a LISP expression that does not require double quotes.
-    # getvar accepts a symbol as well as a string.
-    expr = "(getvar 'ACADVER)"
-    b.send_command(expr)
-
-    # Wait for the log to grow
-    for _ in range(100):
-        try:
-            if os.path.getsize(logp) > pre:
-                break
-        except Exception:
-            pass
-        time.sleep(0.1)
+    # Open the log once and keep reading from `pre`; much cheaper than
+    # stat()-polling the file size and re-opening it at the end.
+    try:
+        f = open(logp, "rb")
+    except Exception as e:
+        print(f"failed to open log: {e}")
+        return 3
 
-    with open(logp, "rb") as f:
+    with f:
         f.seek(pre)
-        data = f.read(8192)
-
-    # Best-effort decode
-    txt = None
-    for enc in ("cp1251", "mbcs", "utf-8"):
-        try:
-            txt = data.decode(enc)
-            break
-        except Exception:
-            pass
-    if txt is None:
-        txt = data.decode("latin1", "replace")
+
+        # Send a LISP expression that does not require double quotes.
+        # getvar accepts a symbol as well as a string.
+        expr = "(getvar 'ACADVER)"
+        b.send_command(expr)
+
+        # Wait for the log to grow
+        buf = bytearray()
+        for _ in range(100):
+            chunk = f.read(8192 - len(buf))
+            if chunk:
+                buf += chunk
+                if len(buf) >= 8192:
+                    break
+                continue
+            if buf:
+                break
+            time.sleep(0.1)
+        data = bytes(buf)
+
+    # Best-effort decode without raising: logs are mostly ASCII; otherwise
+    # AutoCAD writes the ANSI codepage (cp1251 on Russian Windows).
+    if data.isascii():
+        txt = data.decode("ascii")
+    else:
+        txt = data.decode("cp1251", "replace")
 
     print("---new log---")
     print(txt.strip())
@@ -1,17 +1,23 @@
 from __future__ import annotations
 
 from pathlib import Path
-import json
 
 import anyio
 
 from mcp.client.session import ClientSession
 from mcp.client.stdio import StdioServerParameters, stdio_client
 
+from acad_cmd.mcp_result import unwrap_result
+
 
 def _tail_text(path: Path, max_chars: int = 8000) -> str:
+    # Only read (and decode) the end of the file; UTF-8 is at most 4 bytes/char.
     try:
-        data = path.read_bytes()
+        with path.open("rb") as f:
+            f.seek(0, 2)
+            size = f.tell()
+            f.seek(max(0, size - max_chars * 4))
+            data = f.read()
     except Exception:
         return ""
     try:
@@ -21,6 +27,71 @@ def _tail_text(path: Path, max_chars: int = 8000) -> str:
     return txt[-max_chars:]
 
 
+async def _run(session: ClientSession) -> None:
+    print("initialize...", flush=True)
+    await session.initialize()
+
+    print("list_tools...", flush=True)
+    tools = await session.list_tools()
+
+    tool_names = [t.name for t in tools.tools]
+    print("tools:", ", ".join(sorted(tool_names)), flush=True)
+
+    print("start_logging...", flush=True)
+    r = await session.call_tool("start_logging", {"mode": "logfile", "reset": True})
+    if r.isError:
+        raise RuntimeError(f"start_logging error: {r.content}")
+
+    payload = unwrap_result(r)
+    if not isinstance(payload, dict):
+        raise RuntimeError(f"start_logging: unexpected result: {r.content}")
+
+    stream_id = payload.get("stream_id")
+    cursor = int(payload.get("cursor", 0) or 0)
+    print(f"start_logging: stream_id={stream_id} cursor={cursor}", flush=True)
+
+    print("run_lisp...", flush=True)
+    r = await session.call_tool(
+        "run_lisp",
+        {"expr": "(getvar 'ACADVER)", "wait": True, "timeout_sec": 10.0},
+    )
+    if r.isError:
+        raise RuntimeError(f"run_lisp error: {r.content}")
+
+    rc = unwrap_result(r)
+    if not isinstance(rc, dict):
+        raise RuntimeError(f"run_lisp: unexpected result: {r.content}")
+
+    last_prompt = rc.get("last_prompt", "")
+    print("last_prompt:", last_prompt, flush=True)
+
+    log_block = rc.get("log") or {}
+    if log_block.get("text"):
+        print("---log from run_lisp---", flush=True)
+        print(str(log_block.get("text")).strip(), flush=True)
+        cursor = int(log_block.get("cursor", cursor))
+
+    if stream_id:
+        # Give AutoCAD a moment to flush LOGFILE
+        await anyio.sleep(0.5)
+        print("get_new_output_since...", flush=True)
+        r2 = await session.call_tool(
+            "get_new_output_since",
+            {"stream_id": stream_id, "cursor": cursor, "max_bytes": 65536},
+        )
+        if r2.isError:
+            raise RuntimeError(f"get_new_output_since error: {r2.content}")
+
+        oc = unwrap_result(r2)
+        if not isinstance(oc, dict):
+            raise RuntimeError(f"get_new_output_since: unexpected result: {r2.content}")
+
+        text = (oc.get("text") or "").strip()
+        if text:
+            print("---new output since cursor---", flush=True)
+            print(text, flush=True)
+
+
 async def main() -> None:
     root = Path(__file__).resolve().parents[1]
     py = root / ".venv" / "Scripts" / "python.exe"
@@ -48,128 +119,17 @@ async def main() -> None:
         pass
 
     try:
-        with err_path.open("a", encoding="utf-8", errors="replace") as err_f:
+        # Large buffer: server stderr is written in many small pieces.
+        with open(err_path, "a", encoding="utf-8", errors="replace", buffering=65536) as err_f:
             async with stdio_client(params, errlog=err_f) as (read_stream, write_stream):
                 print(f"spawned stdio server (stderr -> {err_path})", flush=True)
 
                 async with ClientSession(read_stream, write_stream) as session:
-                    print("initialize...", flush=True)
-                    with anyio.fail_after(30):
-                        await session.initialize()
-
-                    print("list_tools...", flush=True)
-                    with anyio.fail_after(30):
-                        tools = await session.list_tools()
-
-                    tool_names = [t.name for t in tools.tools]
-                    print("tools:", ", ".join(sorted(tool_names)), flush=True)
-
-                    print("start_logging...", flush=True)
-                    with anyio.fail_after(30):
-                        r = await session.call_tool("start_logging", {"mode": "logfile", "reset": True})
-                    if r.isError:
-                        raise RuntimeError(f"start_logging error: {r.content}")
-
-                    payload = None
-                    if r.structuredContent is not None:
-                        payload = r.structuredContent
-                    else:
-                        # FastMCP commonly returns a single text item with JSON.
-                        for item in r.content or []:
-                            txt = getattr(item, "text", None)
-                            if not isinstance(txt, str):
-                                continue
-                            try:
-                                payload = json.loads(txt)
-                                break
-                            except Exception:
-                                continue
-
-                    if not isinstance(payload, dict):
-                        raise RuntimeError(f"start_logging: unexpected result: {r.content}")
-
-                    # FastMCP wraps tool returns into {"result": {...}}
-                    if isinstance(payload.get("result"), dict):
-                        payload = payload["result"]
-
-                    stream_id = payload.get("stream_id")
-                    cursor = int(payload.get("cursor", 0) or 0)
-                    print(f"start_logging: stream_id={stream_id} cursor={cursor}", flush=True)
-
-                    print("run_lisp...", flush=True)
-                    with anyio.fail_after(30):
-                        r = await session.call_tool(
-                            "run_lisp",
-                            {"expr": "(getvar 'ACADVER)", "wait": True, "timeout_sec": 10.0},
-                        )
-                    if r.isError:
-                        raise RuntimeError(f"run_lisp error: {r.content}")
-
-                    rc = None
-                    if r.structuredContent is not None:
-                        rc = r.structuredContent
-                    else:
-                        for item in r.content or []:
-                            txt = getattr(item, "text", None)
-                            if not isinstance(txt, str):
-                                continue
-                            try:
-                                rc = json.loads(txt)
-                                break
-                            except Exception:
-                                continue
-
-                    if not isinstance(rc, dict):
-                        raise RuntimeError(f"run_lisp: unexpected result: {r.content}")
-
-                    if isinstance(rc.get("result"), dict):
-                        rc = rc["result"]
-
-                    last_prompt = rc.get("last_prompt", "")
-                    print("last_prompt:", last_prompt, flush=True)
-
-                    log_block = rc.get("log") or {}
-                    if log_block.get("text"):
-                        print("---log from run_lisp---", flush=True)
-                        print(str(log_block.get("text")).strip(), flush=True)
-                        cursor = int(log_block.get("cursor", cursor))
-
-                    if stream_id:
-                        # Give AutoCAD a moment to flush LOGFILE
-                        await anyio.sleep(0.5)
-                        print("get_new_output_since...", flush=True)
-                        with anyio.fail_after(30):
-                            r2 = await session.call_tool(
-                                "get_new_output_since",
-                                {"stream_id": stream_id, "cursor": cursor, "max_bytes": 65536},
-                            )
-                        if r2.isError:
-                            raise RuntimeError(f"get_new_output_since error: {r2.content}")
-
-                        oc = None
-                        if r2.structuredContent is not None:
-                            oc = r2.structuredContent
-                        else:
-                            for item in r2.content or []:
-                                txt = getattr(item, "text", None)
-                                if not isinstance(txt, str):
-                                    continue
-                                try:
-                                    oc = json.loads(txt)
-                                    break
-                                except Exception:
-                                    continue
-
-                        if not isinstance(oc, dict):
-                            raise RuntimeError(f"get_new_output_since: unexpected result: {r2.content}")
-
-                        if isinstance(oc.get("result"), dict):
-                            oc = oc["result"]
-
-                        text = (oc.get("text") or "").strip()
-                        if text:
-                            print("---new output since cursor---", flush=True)
-                            print(text, flush=True)
+                    # One deadline for the whole sequence instead of a timer per call.
+                    with anyio.move_on_after(180) as scope:
+                        await _run(session)
+                    if scope.cancelled_caught:
+                        raise TimeoutError("smoke test did not finish within 180s")
 
     except Exception:
         tail = _tail_text(err_path)
@@ -9,22 +9,7 @@ import anyio
 from mcp.client.session import ClientSession
 from mcp.client.stdio import StdioServerParameters, stdio_client
 
-
-def _unwrap_result(r):
-    payload = r.structuredContent if r.structuredContent is not None else None
-    if payload is None:
-        for item in r.content or []:
-            txt = getattr(item, "text", None)
-            if isinstance(txt, str):
-                try:
-                    payload = json.loads(txt)
-                    break
-                except Exception:
-                    continue
-
-    if isinstance(payload, dict) and isinstance(payload.get("result"), dict):
-        payload = payload["result"]
-    return payload
+from acad_cmd.mcp_result import unwrap_result
 
 
 def _validate_selection_payload(payload: dict) -> tuple[bool, str]:
@@ -64,38 +49,38 @@ async def main() -> None:
             with anyio.fail_after(30):
                 await session.initialize()
 
-            try:
-                with anyio.fail_after(75):
-                    r = await session.call_tool(
-                        "selection",
-                        {
-                            "timeout_sec": 60,
-                            "prompt": "Select 1 object and press Enter",
-                            "max_objects": 1,
-                        },
-                    )
-                if r.isError:
-                    raise RuntimeError(f"selection error: {r.content}")
-
-                payload = _unwrap_result(r)
-                if not isinstance(payload, dict):
-                    raise RuntimeError(f"selection unexpected result: {payload!r}")
-
-                ok, reason = _validate_selection_payload(payload)
-                out = {
-                    "ok": True,
-                    "path": "selection",
-                    "count": payload.get("count"),
-                    "timed_out": payload.get("timed_out"),
-                    "payload_valid": bool(ok),
-                    "payload_valid_reason": reason,
-                    "objects_sample": (payload.get("objects") or [])[:3],
-                }
-                sys.stdout.write(json.dumps(out, ensure_ascii=True) + "\n")
-
-            except TimeoutError:
+            r = None
+            with anyio.move_on_after(75) as scope:
+                r = await session.call_tool(
+                    "selection",
+                    {
+                        "timeout_sec": 60,
+                        "prompt": "Select 1 object and press Enter",
+                        "max_objects": 1,
+                    },
+                )
+            if scope.cancelled_caught or r is None:
                 sys.stdout.write(json.dumps({"ok": False, "error": "selection_call_timeout"}, ensure_ascii=True) + "\n")
-
+                return
+
+            if r.isError:
+                raise RuntimeError(f"selection error: {r.content}")
+
+            payload = unwrap_result(r)
+            if not isinstance(payload, dict):
+                raise RuntimeError(f"selection unexpected result: {payload!r}")
+
+            ok, reason = _validate_selection_payload(payload)
+            out = {
+                "ok": True,
+                "path": "selection",
+                "count": payload.get("count"),
+                "timed_out": payload.get("timed_out"),
+                "payload_valid": bool(ok),
+                "payload_valid_reason": reason,
+                "objects_sample": (payload.get("objects") or [])[:3],
+            }
+            sys.stdout.write(json.dumps(out, ensure_ascii=True) + "\n")
 
 if __name__ == "__main__":
     anyio.run(main)
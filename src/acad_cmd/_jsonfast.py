@@ -0,0 +1,29 @@
+"""JSON helpers: use orjson when installed, stdlib json otherwise."""
+
+import json
+from typing import Any, Union
+
+try:
+    import orjson  # type: ignore
+except Exception:  # pragma: no cover
+    orjson = None  # type: ignore
+
+
+def loads(data: Union[str, bytes, bytearray, memoryview]) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    if isinstance(data, memoryview):
+        data = data.tobytes()
+    return json.loads(data)
+
+
+def dumps_line(obj: Any) -> bytes:
+    """Serialize obj as one JSONL record (UTF-8 bytes with trailing newline)."""
+
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_APPEND_NEWLINE)
+        except TypeError:
+            # e.g. ints beyond 64 bits; stdlib handles those.
+            pass
+    return (json.dumps(obj, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
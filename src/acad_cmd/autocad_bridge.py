@@ -1,14 +1,19 @@
+import csv
+import functools
+import itertools
 import os
 import re
 import subprocess
+import threading
 import time
-import uuid
 from dataclasses import dataclass
-from typing import Any, Optional, Tuple
+from typing import Any, Dict, Optional, Tuple
 
 import pythoncom
 import pywintypes
+import win32api
 import win32com.client
+import win32event
 import win32process
 
 try:
@@ -19,6 +24,18 @@ except Exception:  # pragma: no cover
 
 RPC_E_CALL_REJECTED = -2147418111
 
+# Correlation ids for send_command(): unique within the process (audit rows
+# also carry the session_id), no entropy syscall per command.
+_CMD_COUNTER = itertools.count(1)
+_PID = os.getpid()
+
+# A successful liveness probe is trusted for this long; any COM failure in the
+# bridge's own calls (including ones it swallows) resets it so the next check
+# probes again.
+_PROBE_TTL_SEC = 1.0
+
+_tls = threading.local()
+
 
 def _com_init() -> None:
     """Initialize COM for the current thread.
@@ -26,13 +43,18 @@ def _com_init() -> None:
     FastMCP tool calls may run on a thread pool. In pywin32, each thread that
     touches COM must call CoInitialize() (it's safe to call multiple times).
     Missing initialization can lead to hangs/crashes when automating AutoCAD.
+
+    The call is made once per thread; later calls only check a thread-local flag.
     """
 
+    if getattr(_tls, "com_inited", False):
+        return
     try:
         pythoncom.CoInitialize()
     except Exception:
         # Best-effort: if COM is already initialized (or cannot be), proceed.
         pass
+    _tls.com_inited = True
 
 
 _ACADVER_RE = re.compile(r"(?P<major>\d+)\.(?P<minor>\d+)")
@@ -46,7 +68,19 @@ def _parse_acadver_major(v: Any) -> Optional[int]:
 
     if v is None:
         return None
-    s = str(v).strip().strip('"').strip("'")
+    s = str(v)
+
+    # Fast path for the common '<major>.<minor>...' form: no regex, no copies.
+    n = len(s)
+    i = 0
+    while i < n and s[i] in "\"' \t":
+        i += 1
+    k = i
+    while k < n and "0" <= s[k] <= "9":
+        k += 1
+    if k > i and k + 1 < n and s[k] == "." and "0" <= s[k + 1] <= "9":
+        return int(s[i:k])
+
     m = _ACADVER_RE.search(s)
     if not m:
         return None
@@ -56,6 +90,8 @@ def _parse_acadver_major(v: Any) -> Optional[int]:
         return None
 
 
+# Connection settings are read once per process (env changes need a restart).
+@functools.lru_cache(maxsize=1)
 def _get_target_major() -> Optional[int]:
     # AutoCAD 2021 corresponds to major version 24.*
     raw = (os.environ.get("AUTOCAD_MCP_TARGET_MAJOR") or "").strip()
@@ -67,6 +103,7 @@ def _get_target_major() -> Optional[int]:
         return None
 
 
+@functools.lru_cache(maxsize=1)
 def _allow_new_instance() -> bool:
     # If explicitly configured, obey it.
     raw = (os.environ.get("AUTOCAD_MCP_ALLOW_NEW_INSTANCE") or "").strip().lower()
@@ -79,8 +116,83 @@ def _allow_new_instance() -> bool:
     return True
 
 
+# GetModuleFileNameEx needs QUERY_INFORMATION + VM_READ; QueryFullProcessImageName
+# works with the limited right, which is granted for more (e.g. elevated) processes.
+_PROCESS_QUERY_INFORMATION = 0x0400
+_PROCESS_VM_READ = 0x0010
+_PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+_HAS_QUERY_FULL_IMAGE_NAME = hasattr(win32process, "QueryFullProcessImageName")
+
+
+def _process_image_path(pid: int) -> str:
+    """Full image path of a process, or "" if it cannot be opened/queried.
+
+    Uses the limited right with QueryFullProcessImageName; the VM_READ route
+    is only a fallback for pywin32 builds without that call.
+    """
+
+    if _HAS_QUERY_FULL_IMAGE_NAME:
+        access = _PROCESS_QUERY_LIMITED_INFORMATION
+    else:
+        access = _PROCESS_QUERY_INFORMATION | _PROCESS_VM_READ
+    try:
+        h = win32api.OpenProcess(access, False, pid)
+    except Exception:
+        # Access denied / process already gone.
+        return ""
+    try:
+        if _HAS_QUERY_FULL_IMAGE_NAME:
+            return str(win32process.QueryFullProcessImageName(h, 0) or "")
+        return str(win32process.GetModuleFileNameEx(h, 0) or "")
+    except Exception:
+        return ""
+    finally:
+        try:
+            win32api.CloseHandle(h)
+        except Exception:
+            pass
+
+
+def _enum_process_pids(image_name: str) -> Optional[Tuple[int, ...]]:
+    """Return process IDs for an image name via EnumProcesses().
+
+    Returns None if process enumeration itself is unavailable, or if no
+    process name at all could be resolved, so callers can fall back to
+    tasklist.exe instead of trusting an empty result.
+    """
+
+    try:
+        all_pids = win32process.EnumProcesses()
+    except Exception:
+        return None
+
+    want = image_name.lower()
+    pids: list[int] = []
+    resolved = 0
+    for pid in all_pids:
+        if not pid:
+            continue
+        exe = _process_image_path(int(pid))
+        if not exe:
+            continue
+        resolved += 1
+        if os.path.basename(exe).lower() == want:
+            pids.append(int(pid))
+    if not resolved:
+        return None
+    return tuple(pids)
+
+
 def _tasklist_pids(image_name: str) -> Tuple[int, ...]:
-    """Return process IDs for a given image name (best-effort)."""
+    """Return process IDs for a given image name (best-effort).
+
+    Uses EnumProcesses() directly; spawning tasklist.exe is only a fallback
+    (it costs far more than the enumeration itself).
+    """
+
+    pids_fast = _enum_process_pids(image_name)
+    if pids_fast is not None:
+        return pids_fast
 
     try:
         out = subprocess.check_output(
@@ -94,18 +206,12 @@ def _tasklist_pids(image_name: str) -> Tuple[int, ...]:
         return ()
 
     pids: list[int] = []
-    for line in out.splitlines():
-        line = line.strip()
-        if not line or line.startswith("INFO:"):
-            continue
-        # CSV: "Image Name","PID",...
-        parts = [p.strip().strip('"') for p in line.split(",")]
-        if len(parts) < 2:
-            continue
-        try:
-            pids.append(int(parts[1]))
-        except Exception:
-            continue
+    # CSV: "Image Name","PID",...  ("INFO: ..." lines have no PID column)
+    for row in csv.reader(out.splitlines()):
+        if len(row) >= 2:
+            pid = row[1].strip()
+            if pid.isdigit():
+                pids.append(int(pid))
     return tuple(pids)
 
 
@@ -137,13 +243,19 @@ def _is_callee_busy(err: Exception) -> bool:
     return False
 
 
-def com_retry(fn, *, retries: int = 15, base_delay: float = 0.05, max_delay: float = 0.8):
+def com_retry(fn, *args: Any, retries: int = 15, base_delay: float = 0.05, max_delay: float = 0.8):
+    """Call fn(*args), retrying with backoff while AutoCAD reports "callee busy".
+
+    Pass arguments positionally instead of wrapping the call in a lambda; this
+    avoids late-binding surprises when called from a loop.
+    """
+
     _com_init()
     delay = base_delay
     last = None
     for _ in range(retries):
         try:
-            return fn()
+            return fn(*args)
         except Exception as e:
             last = e
             if not _is_callee_busy(e):
@@ -154,6 +266,41 @@ def com_retry(fn, *, retries: int = 15, base_delay: float = 0.05, max_delay: flo
         raise last
 
 
+class _AcadIdleEvents:
+    """AcadApplication event sink that signals `wake` when a command or LISP ends.
+
+    Created through win32com.client.WithEvents; `wake` is attached afterwards.
+    """
+
+    wake: Any = None
+
+    def _signal(self, *args: Any) -> None:
+        if self.wake is not None:
+            win32event.SetEvent(self.wake)
+
+    OnEndCommand = _signal
+    OnEndLisp = _signal
+    OnLispCancelled = _signal
+
+
+def _wait_for_wakeup(handle: Any, timeout_sec: float) -> None:
+    """Block until `handle` is signalled or `timeout_sec` passes, pumping COM messages.
+
+    Events are delivered to this STA thread as window messages, so waiting must
+    keep the message loop running.
+    """
+
+    deadline = time.monotonic() + timeout_sec
+    while True:
+        ms = max(0, int((deadline - time.monotonic()) * 1000))
+        rc = win32event.MsgWaitForMultipleObjects((handle,), False, ms, win32event.QS_ALLINPUT)
+        if rc != win32event.WAIT_OBJECT_0 + 1:
+            return
+        pythoncom.PumpWaitingMessages()
+        if ms == 0:
+            return
+
+
 @dataclass
 class WaitResult:
     completed: bool
@@ -166,6 +313,10 @@ class AutoCADBridge:
         self._acad = None
         self._doc = None
         self._connected = False
+        # Bumped on every successful connect(); lets callers notice reconnects.
+        self._connect_count = 0
+        self._probe_ok_ts = 0.0
+        self._progids_cache: Optional[Tuple[Tuple[Optional[int], bool], Tuple[str, ...]]] = None
 
     def _get_acad_progids(self) -> Tuple[str, ...]:
         """Return ProgIDs to try, in preferred order.
@@ -179,6 +330,13 @@ class AutoCADBridge:
         """
 
         target_major = _get_target_major()
+        prefer_curver = (os.environ.get("AUTOCAD_MCP_PREFER_CURVER") or "").strip().lower() in ("1", "true", "yes")
+
+        # connect() asks for this list repeatedly (e.g. in the launch-wait loop);
+        # only rebuild it (and re-read the registry) when the settings change.
+        key = (target_major, prefer_curver)
+        if self._progids_cache is not None and self._progids_cache[0] == key:
+            return self._progids_cache[1]
 
         progids: list[str] = []
 
@@ -194,7 +352,6 @@ class AutoCADBridge:
                 progids.append(p)
 
         # CurVer (optional) - some setups only register this.
-        prefer_curver = (os.environ.get("AUTOCAD_MCP_PREFER_CURVER") or "").strip().lower() in ("1", "true", "yes")
         if prefer_curver and winreg is not None:
             for root, key_path in (
                 (winreg.HKEY_CLASSES_ROOT, r"AutoCAD.Application\\CurVer"),
@@ -213,7 +370,9 @@ class AutoCADBridge:
 
         # Unversioned last.
         progids.append("AutoCAD.Application")
-        return tuple(progids)
+        result = tuple(progids)
+        self._progids_cache = (key, result)
+        return result
 
     def connect(self, *, attach_or_launch: bool = True, visible: bool = True) -> bool:
         _com_init()
@@ -230,7 +389,7 @@ class AutoCADBridge:
 
             if target_major is not None:
                 try:
-                    acadver = com_retry(lambda: doc.GetVariable("ACADVER"))
+                    acadver = com_retry(doc.GetVariable, "ACADVER")
                     major = _parse_acadver_major(acadver)
                     if major is None or major != target_major:
                         return False
@@ -241,10 +400,11 @@ class AutoCADBridge:
 
         for progid in self._get_acad_progids():
             try:
-                ok = com_retry(lambda: _attach(progid))
+                ok = com_retry(_attach, progid)
 
                 self._connected = bool(ok)
                 if self._connected:
+                    self._connect_count += 1
                     return True
             except Exception:
                 continue
@@ -266,7 +426,6 @@ class AutoCADBridge:
                     if "." not in progid:
                         continue
                     try:
-                        _com_init()
                         self._acad = win32com.client.Dispatch(progid)
                         self._acad.Visible = bool(visible)
                         spawned_pid = _get_hwnd_pid(getattr(self._acad, "HWND", None))
@@ -289,12 +448,13 @@ class AutoCADBridge:
                         _ = str(doc.Name)
 
                         if target_major is not None:
-                            acadver = com_retry(lambda: doc.GetVariable("ACADVER"))
+                            acadver = com_retry(doc.GetVariable, "ACADVER")
                             major = _parse_acadver_major(acadver)
                             if major is None or major != target_major:
                                 continue
 
                         self._connected = True
+                        self._connect_count += 1
                         return True
                     except Exception:
                         continue
@@ -306,6 +466,7 @@ class AutoCADBridge:
         if attach_or_launch:
             acad_exe = (os.environ.get("AUTOCAD_MCP_ACAD_EXE") or "").strip().strip('"')
             if acad_exe and os.path.exists(acad_exe):
+                proc = None
                 try:
                     extra = (os.environ.get("AUTOCAD_MCP_ACAD_ARGS") or "").strip()
                     args = [acad_exe]
@@ -317,7 +478,7 @@ class AutoCADBridge:
                         except Exception:
                             # Last resort: split on whitespace
                             args.extend([p for p in extra.split() if p.strip()])
-                    subprocess.Popen(args, close_fds=True)
+                    proc = subprocess.Popen(args, close_fds=True)
                 except Exception:
                     pass
 
@@ -326,32 +487,109 @@ class AutoCADBridge:
                     wait_sec = float((os.environ.get("AUTOCAD_MCP_LAUNCH_WAIT_SEC") or "30").strip())
                 except Exception:
                     wait_sec = 30.0
+                # One budget for the whole launch: the idle wait and the attach
+                # rounds both count against it.
+                deadline = time.time() + wait_sec
+
+                # Block until the new process finishes initializing its UI instead
+                # of hammering the ROT while AutoCAD is still loading. Popen only
+                # exposes the process handle privately, so check for it.
+                proc_handle = getattr(proc, "_handle", None) if proc is not None else None
+                if proc_handle is not None:
+                    try:
+                        win32event.WaitForInputIdle(int(proc_handle), int(wait_sec * 1000))
+                    except Exception:
+                        # Not a GUI process yet / handle unusable: fall back to polling.
+                        pass
+
+                # With a pinned major, only that ProgID can pass the ACADVER check.
+                progids = self._get_acad_progids()
+                if target_major:
+                    progids = progids[:1]
 
-                t0 = time.time()
-                while time.time() - t0 < wait_sec:
-                    for progid in self._get_acad_progids():
+                # At least one attach round, even if the idle wait used up the budget.
+                while True:
+                    for progid in progids:
                         try:
-                            ok = com_retry(lambda: _attach(progid))
+                            ok = com_retry(_attach, progid)
                             self._connected = bool(ok)
                             if self._connected:
+                                self._connect_count += 1
                                 return True
                         except Exception:
                             continue
+                    if time.time() >= deadline:
+                        break
                     time.sleep(0.5)
 
         self._connected = False
         return False
 
+    @property
+    def connection_epoch(self) -> int:
+        return self._connect_count
+
+    def _attach_idle_sink(self, acad: Any) -> Tuple[Any, Any]:
+        """Register an EndCommand/EndLisp sink and its wakeup handle; (None, None) if unavailable.
+
+        Only held while wait_for_idle pumps messages: a sink on a thread that is
+        not pumping would leave AutoCAD's synchronous event calls waiting.
+        """
+
+        sink = handle = None
+        try:
+            if acad is not None:
+                handle = win32event.CreateEvent(None, False, False, None)
+                sink = win32com.client.WithEvents(acad, _AcadIdleEvents)
+                sink.wake = handle
+        except Exception:
+            self._release_idle_sink(sink, handle)
+            return None, None
+        return sink, handle
+
+    @staticmethod
+    def _release_idle_sink(sink: Any, handle: Any) -> None:
+        if sink is not None:
+            try:
+                sink.close()
+            except Exception:
+                pass
+        if handle is not None:
+            try:
+                win32api.CloseHandle(handle)
+            except Exception:
+                pass
+
     def ensure_connection(self) -> bool:
         _com_init()
         if not self._connected or self._acad is None or self._doc is None:
-            return self.connect(attach_or_launch=True)
+            return self._reconnect()
+        now = time.monotonic()
+        if now - self._probe_ok_ts < _PROBE_TTL_SEC:
+            return True
         try:
             _ = str(self._doc.Name)
+            self._probe_ok_ts = now
             return True
         except Exception:
             self._connected = False
-            return self.connect(attach_or_launch=True)
+            return self._reconnect()
+
+    def _reconnect(self) -> bool:
+        self._probe_ok_ts = 0.0
+        ok = self.connect(attach_or_launch=True)
+        if ok:
+            self._probe_ok_ts = time.monotonic()
+        return ok
+
+    def _retry(self, fn, *args: Any) -> Any:
+        """com_retry() that makes the next ensure_connection() probe for real on failure."""
+
+        try:
+            return com_retry(fn, *args)
+        except Exception:
+            self._probe_ok_ts = 0.0
+            raise
 
     @property
     def acad(self) -> Any:
@@ -376,61 +614,145 @@ class AutoCADBridge:
                 return os.path.join(path, name)
             return name
         except Exception:
+            # Make the next ensure_connection() probe instead of trusting the TTL.
+            self._probe_ok_ts = 0.0
             return None
 
     def get_variable(self, name: str) -> Any:
         _com_init()
         def _op():
             return self.doc.GetVariable(name)
-        return com_retry(_op)
+        return self._retry(_op)
+
+    def get_variables(self, names: Tuple[str, ...]) -> Dict[str, Any]:
+        """Read several system variables with a single connection check.
+
+        `doc` performs a COM liveness probe on every access; resolving it once
+        avoids one extra round-trip per variable. Unreadable variables map to None.
+        """
+
+        _com_init()
+        out: Dict[str, Any] = {}
+        try:
+            doc = self.doc
+        except Exception:
+            return {name: None for name in names}
+        for name in names:
+            try:
+                out[name] = com_retry(doc.GetVariable, name)
+            except pywintypes.com_error:
+                self._probe_ok_ts = 0.0
+                out[name] = None
+            except Exception:
+                out[name] = None
+        return out
 
     def set_variable(self, name: str, value: Any) -> None:
         _com_init()
         def _op():
             self.doc.SetVariable(name, value)
-        com_retry(_op)
+        self._retry(_op)
 
     def send_command(self, command: str) -> str:
         _com_init()
+        # Kept as str: SendCommand takes a BSTR (UTF-16), which pywin32 builds
+        # directly from the str; a bytes payload would need decoding first.
         cmd = command
         if not cmd.endswith("\n"):
             cmd += "\n"
-        command_id = str(uuid.uuid4())
+        command_id = f"{_PID}-{next(_CMD_COUNTER)}"
 
         def _op():
             self.doc.SendCommand(cmd)
             return True
 
-        com_retry(_op)
+        self._retry(_op)
         return command_id
 
     def wait_for_idle(self, timeout_sec: float, poll_interval_sec: float = 0.1) -> WaitResult:
+        """Wait until AutoCAD has no active command and reports quiescent state.
+
+        The first probe happens immediately (short commands are usually done by
+        the time SendCommand returns). After that the poll delay grows
+        exponentially from a few milliseconds up to `poll_interval_sec`; if the
+        first probe is not idle, an EndCommand/EndLisp event sink (registered
+        for this call only) is attached and cuts each delay short so the next
+        probe runs right away.
+
+        If probing fails even after one reconnect attempt, RuntimeError is
+        raised rather than waiting out the timeout.
+        """
+
         _com_init()
         t0 = time.time()
-        last_quiescent = False
+        max_delay = max(0.001, float(poll_interval_sec))
+        delay = min(0.005, max_delay)
 
-        while True:
-            try:
-                state = self.acad.GetAcadState()
-                is_quiescent = bool(state.IsQuiescent)
-            except Exception:
+        # Resolve the COM objects once: `acad`/`doc` re-check the connection
+        # (an extra round-trip) on every access.
+        try:
+            acad = self.acad
+            doc = self._doc
+        except Exception:
+            acad = None
+            doc = None
+        # The event sink is attached lazily, after the first non-idle probe:
+        # most commands are already done by then and never pay for it.
+        sink = wake = None
+        attached = False
+        reconnected = False
+
+        try:
+            while True:
+                try:
+                    cmdactive = int(com_retry(doc.GetVariable, "CMDACTIVE"))
+                except Exception as e:
+                    # Busy/rejected calls were already retried by com_retry, so
+                    # this is a real failure: reconnect once, then give up
+                    # instead of polling a dead connection until the timeout.
+                    self._probe_ok_ts = 0.0
+                    if reconnected or not self.ensure_connection():
+                        raise RuntimeError(f"Lost connection to AutoCAD while waiting for idle: {e}") from e
+                    reconnected = True
+                    acad = self._acad
+                    doc = self._doc
+                    self._release_idle_sink(sink, wake)
+                    sink = wake = None
+                    attached = False
+                    continue
+
+                # AutoCAD is never quiescent while a command is active, so only
+                # pay for the GetAcadState() round-trip when it can change the result.
                 is_quiescent = False
+                if cmdactive == 0:
+                    try:
+                        state = acad.GetAcadState()
+                        is_quiescent = bool(state.IsQuiescent)
+                    except Exception:
+                        is_quiescent = False
 
-            try:
-                cmdactive = int(self.get_variable("CMDACTIVE"))
-            except Exception:
-                cmdactive = 999
+                if is_quiescent and cmdactive == 0:
+                    return WaitResult(completed=True, needs_input=False, quiescent=True)
 
-            last_quiescent = is_quiescent
-            if is_quiescent and cmdactive == 0:
-                return WaitResult(completed=True, needs_input=False, quiescent=True)
+                if time.time() - t0 >= timeout_sec:
+                    # Not idle. Likely waiting for input or long running.
+                    needs_input = cmdactive != 0
+                    return WaitResult(completed=False, needs_input=needs_input, quiescent=is_quiescent)
 
-            if time.time() - t0 >= timeout_sec:
-                # Not idle. Likely waiting for input or long running.
-                needs_input = cmdactive != 0
-                return WaitResult(completed=False, needs_input=needs_input, quiescent=is_quiescent)
+                if not attached:
+                    # Probe again right away: an EndCommand fired before the
+                    # sink existed would otherwise cost a full delay.
+                    sink, wake = self._attach_idle_sink(acad)
+                    attached = True
+                    continue
 
-            time.sleep(poll_interval_sec)
+                if wake is not None:
+                    _wait_for_wakeup(wake, delay)
+                else:
+                    time.sleep(delay)
+                delay = min(max_delay, delay * 1.5)
+        finally:
+            self._release_idle_sink(sink, wake)
 
     def get_last_prompt(self) -> str:
         _com_init()
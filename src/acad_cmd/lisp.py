@@ -19,14 +19,12 @@ def build_load_lisp_command(path: str) -> str:
 
 def build_run_lisp_script(expr: str, marker_id: str) -> str:
     # Send multiple LISP lines in one SendCommand call.
-    # Markers appear in command history/logfile.
-    start = f'(prompt "\\n[MCP:LISP id={marker_id} start]")'
-    end = f'(prompt "\\n[MCP:LISP id={marker_id} end]")'
-    # Ensure prompt lines are printed.
-    return "\n".join([
-        start,
-        "(princ)",
-        expr,
-        end,
-        "(princ)",
-    ])
+    # Markers appear in command history/logfile; (princ) ensures prompt lines are printed.
+    # Built as one string (with the trailing newline SendCommand needs anyway).
+    return (
+        f'(prompt "\\n[MCP:LISP id={marker_id} start]")\n'
+        "(princ)\n"
+        f"{expr}\n"
+        f'(prompt "\\n[MCP:LISP id={marker_id} end]")\n'
+        "(princ)\n"
+    )
@@ -0,0 +1,28 @@
+"""Helpers for MCP client code (smoke tests / scripts)."""
+
+from typing import Any
+
+from ._jsonfast import loads
+
+
+def unwrap_result(r: Any) -> Any:
+    """Return the JSON payload of a CallToolResult.
+
+    Prefers `structuredContent`; otherwise parses the first JSON text item.
+    FastMCP wraps tool returns as {"result": {...}}; that wrapper is removed.
+    """
+
+    payload = r.structuredContent
+    if payload is None:
+        for item in r.content or []:
+            txt = getattr(item, "text", None)
+            if isinstance(txt, str):
+                try:
+                    payload = loads(txt)
+                    break
+                except Exception:
+                    continue
+
+    if isinstance(payload, dict) and isinstance(payload.get("result"), dict):
+        payload = payload["result"]
+    return payload
@@ -1,126 +1,641 @@
+import codecs
 import locale
+import mmap
 import os
-from collections import deque
-from dataclasses import dataclass
-from typing import Deque, Dict, Optional, Tuple
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import BinaryIO, Dict, List, Optional, Tuple, Union
+
+try:
+    import win32event  # type: ignore
+    import win32file  # type: ignore
+except Exception:  # pragma: no cover
+    win32event = None  # type: ignore
+    win32file = None  # type: ignore
+
+
+# Tails at least this large are copied out of a memory map instead of read().
+_MMAP_TAIL_MIN_BYTES = 1 << 20
+
+
+_HAS_PREAD = hasattr(os, "pread")
+_HAS_PREADV = hasattr(os, "preadv")
+# Access-pattern hints for the logfile, which is only ever read forward:
+# O_SEQUENTIAL maps to FILE_FLAG_SEQUENTIAL_SCAN on Windows; posix_fadvise is the POSIX analogue.
+_OPEN_FLAGS = os.O_RDONLY | getattr(os, "O_BINARY", 0) | getattr(os, "O_SEQUENTIAL", 0)
+_HAS_FADVISE = hasattr(os, "posix_fadvise")
+
+
+# A "no change" notification is only trusted this long after the last stat();
+# NTFS may report size changes of a file held open by its writer lazily.
+_CHANGE_HINT_MAX_AGE_SEC = 0.2
 
 
 def _preferred_text_encoding() -> str:
-    enc = locale.getpreferredencoding(False) or "utf-8"
-    return enc
+    enc = os.environ.get("AUTOCAD_MCP_LOG_ENCODING") or locale.getpreferredencoding(False) or "utf-8"
+    try:
+        return codecs.lookup(enc).name
+    except LookupError:
+        return "utf-8"
+
 
+# Resolved once: the locale lookup is not free and does not change under us.
+_PREFERRED_ENC = _preferred_text_encoding()
 
-@dataclass
+
+class _DirChangeWatcher:
+    """Directory change-notification handle (Windows), used as a growth hint."""
+
+    def __init__(self, directory: str) -> None:
+        self._h = win32file.FindFirstChangeNotification(
+            directory,
+            False,
+            win32file.FILE_NOTIFY_CHANGE_SIZE | win32file.FILE_NOTIFY_CHANGE_LAST_WRITE,
+        )
+
+    def changed(self) -> bool:
+        """Return True (and re-arm) if anything changed since the last call."""
+
+        try:
+            if win32event.WaitForSingleObject(self._h, 0) != win32event.WAIT_OBJECT_0:
+                return False
+            win32file.FindNextChangeNotification(self._h)
+        except Exception:
+            pass
+        return True
+
+    def wait(self, timeout_sec: float) -> bool:
+        """Block up to timeout_sec for a change; True (and re-armed) if one arrived."""
+
+        try:
+            rc = win32event.WaitForSingleObject(self._h, max(0, int(timeout_sec * 1000)))
+            if rc != win32event.WAIT_OBJECT_0:
+                return False
+            win32file.FindNextChangeNotification(self._h)
+        except Exception:
+            time.sleep(timeout_sec)
+        return True
+
+    def close(self) -> None:
+        try:
+            win32file.FindCloseChangeNotification(self._h)
+        except Exception:
+            pass
+
+
+@dataclass(slots=True)
 class OutputStream:
     stream_id: str
     mode: str  # logfile|lastprompt
     logfile_path: Optional[str]
     cursor: int
-    ring: Deque[str]
+    # Circular buffer with the most recent raw (undecoded) bytes read.
+    ring: bytearray
+    ring_cap: int
     started_by_server: bool = True
+    ring_pos: int = 0
+    # Logfile kept open across reads; reopened if the file is replaced.
+    fh: Optional[BinaryIO] = None
+    # Incremental decoder for read_new; valid while reads continue at decoder_pos.
+    decoder: Optional[codecs.IncrementalDecoder] = None
+    decoder_pos: int = -1
+    # Reused across read_new calls; grows to the largest chunk requested.
+    readbuf: bytearray = field(default_factory=bytearray)
+    # Change notifications for the logfile's directory (None if unavailable),
+    # plus the size/time of the last stat() they are relative to.
+    watcher: Optional[_DirChangeWatcher] = None
+    known_size: int = -1
+    stat_ts: float = 0.0
+
+    def read_new(self, mgr: "OutputStreamManager", cursor: int, max_bytes: int) -> Tuple[str, int, bool]:
+        return "", cursor, False
+
+    def read_new_bytes(self, mgr: "OutputStreamManager", cursor: int, max_bytes: int) -> Tuple[bytes, int, bool]:
+        return b"", cursor, False
+
+
+@dataclass(slots=True)
+class LogfileStream(OutputStream):
+    """Stream backed by a logfile; logfile_path is always set."""
+
+    def _fresh_stat(self, cursor: int) -> Optional[os.stat_result]:
+        """stat() the logfile, or None if there is certainly nothing new at cursor."""
+
+        # Caught up and nothing changed in the directory since a recent stat():
+        # no need to enter the kernel at all.
+        now = time.monotonic()
+        if (
+            self.watcher is not None
+            and cursor == self.known_size
+            and now - self.stat_ts < _CHANGE_HINT_MAX_AGE_SEC
+            and not self.watcher.changed()
+        ):
+            return None
+
+        try:
+            st = os.stat(self.logfile_path)  # type: ignore[arg-type]
+        except OSError:
+            return None
+        self.known_size = st.st_size
+        self.stat_ts = now
+        return st
+
+    def read_new(self, mgr: "OutputStreamManager", cursor: int, max_bytes: int) -> Tuple[str, int, bool]:
+        st = self._fresh_stat(cursor)
+        if st is None:
+            return "", cursor, False
+        return mgr._read_new_at(self, st, cursor, max_bytes)
+
+    def read_new_bytes(self, mgr: "OutputStreamManager", cursor: int, max_bytes: int) -> Tuple[bytes, int, bool]:
+        st = self._fresh_stat(cursor)
+        if st is None:
+            return b"", cursor, False
+        return mgr._read_new_at(self, st, cursor, max_bytes, decode=False)  # type: ignore[return-value]
+
+
+@dataclass(slots=True)
+class LastpromptStream(OutputStream):
+    """Logical stream with no backing file; read_new never returns data."""
 
 
 class OutputStreamManager:
-    def __init__(self, base_dir: str, ring_max_chunks: int = 200) -> None:
+    def __init__(self, base_dir: str, ring_max_bytes: int = 200 * 4096) -> None:
         self.base_dir = base_dir
-        self.ring_max_chunks = ring_max_chunks
+        self.ring_max_bytes = ring_max_bytes
         os.makedirs(self.base_dir, exist_ok=True)
         self._streams: Dict[str, OutputStream] = {}
         self._default_stream_id: Optional[str] = None
+        # Resolved object for _default_stream_id (hot path: every poll/send).
+        self._default_stream: Optional[OutputStream] = None
+        # Logfile path of the default stream when it is a logfile stream, else None.
+        self.default_logfile_path: Optional[str] = None
+        # Start order of stream ids (may hold stopped ids); the most recent live
+        # one becomes the default when the default stream is stopped.
+        self._recent: List[str] = []
+        # Resolved once: locale lookup is not free and does not change at runtime.
+        self._encoding = _PREFERRED_ENC
+        # Guards the shared file offset where os.pread is unavailable (Windows).
+        self._seek_lock = threading.Lock()
 
-    def get_default(self) -> Optional[OutputStream]:
-        if self._default_stream_id is None:
+    @staticmethod
+    def _close_fh(s: OutputStream) -> None:
+        if s.fh is not None:
+            try:
+                s.fh.close()
+            except Exception:
+                pass
+            s.fh = None
+
+    def _logfile_handle(self, s: OutputStream, st: os.stat_result) -> Optional[BinaryIO]:
+        """Return an open handle for the stream's logfile (opened lazily).
+
+        `st` is a fresh stat of the path; if it no longer refers to the file we
+        hold open (rotated/recreated), the handle is reopened.
+        """
+
+        if s.fh is not None:
+            try:
+                if os.fstat(s.fh.fileno()).st_ino == st.st_ino:
+                    return s.fh
+            except Exception:
+                pass
+            self._close_fh(s)
+        # One handle per stream, reused by every poll. On Windows the CRT opens
+        # with FILE_SHARE_READ | FILE_SHARE_WRITE, so AutoCAD keeps appending.
+        try:
+            fd = os.open(s.logfile_path, _OPEN_FLAGS)  # type: ignore[arg-type]
+        except OSError:
+            s.fh = None
             return None
-        return self._streams.get(self._default_stream_id)
+        if _HAS_FADVISE:
+            try:
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+            except OSError:
+                pass
+        s.fh = os.fdopen(fd, "rb", buffering=0)
+        return s.fh
+
+    @staticmethod
+    def _ring_append(s: OutputStream, data: memoryview) -> None:
+        cap = s.ring_cap
+        n = len(data)
+        if cap <= 0 or n == 0:
+            return
+        buf = s.ring
+        mv = memoryview(data)
+        if n >= cap:
+            buf[:] = mv[n - cap :]
+            s.ring_pos = 0
+            return
+        if len(buf) < cap:
+            # Still filling up: plain append until the buffer reaches capacity.
+            room = cap - len(buf)
+            if n <= room:
+                buf += mv
+                s.ring_pos = len(buf) % cap
+                return
+            buf += mv[:room]
+            mv = mv[room:]
+            n -= room
+            s.ring_pos = 0
+        pos = s.ring_pos
+        first = min(n, cap - pos)
+        buf[pos : pos + first] = mv[:first]
+        if n > first:
+            buf[: n - first] = mv[first:]
+        s.ring_pos = (pos + n) % cap
+
+    def _decode(self, data: bytes) -> str:
+        # Command-line output is mostly ASCII, and every locale codepage is an
+        # ASCII superset; skip the codec machinery for that case.
+        if data.isascii():
+            return data.decode("ascii")
+        try:
+            return data.decode(self._encoding, errors="replace")
+        except Exception:
+            return data.decode("utf-8", errors="replace")
+
+    def decode(self, data: bytes) -> str:
+        """Decode raw logfile bytes (e.g. from read_new_bytes) with the log encoding."""
+
+        return self._decode(data)
+
+    def _decode_chunk(self, s: OutputStream, data: memoryview, cursor: int) -> str:
+        """Decode a read_new chunk, carrying partial multi-byte sequences over.
+
+        A character split by the max_bytes boundary is completed by the next
+        read. If the caller jumps to a different cursor, the state is dropped.
+        """
+
+        if s.decoder is None or s.decoder_pos != cursor:
+            try:
+                s.decoder = codecs.getincrementaldecoder(self._encoding)(errors="replace")
+            except LookupError:
+                s.decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        s.decoder_pos = cursor + len(data)
+        # The C codecs (utf-8, cp125x charmaps) already fast-path ASCII input.
+        return s.decoder.decode(data, final=False)
+
+    def _pread(self, f: BinaryIO, size: int, offset: int) -> bytes:
+        """Read `size` bytes at `offset` without relying on the handle's offset."""
+
+        if _HAS_PREAD:
+            return os.pread(f.fileno(), size, offset)
+        with self._seek_lock:
+            f.seek(offset)
+            return f.read(size) or b""
+
+    def _pread_into(self, f: BinaryIO, buf: memoryview, offset: int) -> int:
+        """Fill `buf` from `offset`; returns the number of bytes read."""
+
+        if _HAS_PREADV:
+            return os.preadv(f.fileno(), [buf], offset)
+        with self._seek_lock:
+            f.seek(offset)
+            return f.readinto(buf) or 0
+
+    def _set_default(self, stream_id: Optional[str]) -> None:
+        self._default_stream_id = stream_id
+        s = self._streams.get(stream_id) if stream_id is not None else None
+        self._default_stream = s
+        self.default_logfile_path = s.logfile_path if type(s) is LogfileStream else None
+
+    def get_default(self) -> Optional[OutputStream]:
+        return self._default_stream
 
     def get(self, stream_id: str) -> Optional[OutputStream]:
+        """Look up a stream; ids kept by the caller (e.g. the returned s.stream_id) are interned."""
+
         return self._streams.get(stream_id)
 
     def start_logfile_stream(self, *, stream_id: str, logfile_path: str, cursor: int, started_by_server: bool) -> OutputStream:
-        ring: Deque[str] = deque(maxlen=self.ring_max_chunks)
-        s = OutputStream(
+        # Interned ids: the server reuses these objects, so dict lookups hit the identity check.
+        stream_id = sys.intern(stream_id)
+        if not logfile_path:
+            raise ValueError("logfile_path is required")
+        s = LogfileStream(
             stream_id=stream_id,
             mode="logfile",
             logfile_path=logfile_path,
             cursor=cursor,
-            ring=ring,
+            ring=bytearray(),
+            ring_cap=self.ring_max_bytes,
             started_by_server=started_by_server,
         )
+        if win32file is not None:
+            try:
+                s.watcher = _DirChangeWatcher(os.path.dirname(os.path.abspath(logfile_path)))
+            except Exception:
+                s.watcher = None
         self._streams[stream_id] = s
-        self._default_stream_id = stream_id
+        self._recent.append(stream_id)
+        self._set_default(stream_id)
         return s
 
     def start_lastprompt_stream(self, *, stream_id: str) -> OutputStream:
-        ring: Deque[str] = deque(maxlen=self.ring_max_chunks)
-        s = OutputStream(
+        stream_id = sys.intern(stream_id)
+        s = LastpromptStream(
             stream_id=stream_id,
             mode="lastprompt",
             logfile_path=None,
             cursor=0,
-            ring=ring,
+            ring=bytearray(),
+            ring_cap=self.ring_max_bytes,
             started_by_server=False,
         )
         self._streams[stream_id] = s
-        self._default_stream_id = stream_id
+        self._recent.append(stream_id)
+        self._set_default(stream_id)
         return s
 
     def stop(self, stream_id: str) -> bool:
-        if stream_id not in self._streams:
-            return False
-        del self._streams[stream_id]
+        return self.stop_and_get(stream_id) is not None
+
+    def stop_and_get(self, stream_id: str) -> Optional[OutputStream]:
+        """Stop a stream and return it (None if it was not running)."""
+
+        s = self._streams.pop(stream_id, None)
+        if s is None:
+            return None
+        self._close_fh(s)
+        if s.watcher is not None:
+            s.watcher.close()
+            s.watcher = None
+        recent = self._recent
+        if len(recent) > 2 * len(self._streams) + 8:
+            self._recent = recent = [sid for sid in recent if sid in self._streams]
         if self._default_stream_id == stream_id:
-            self._default_stream_id = next(iter(self._streams), None)
-        return True
+            while recent and recent[-1] not in self._streams:
+                recent.pop()
+            self._set_default(recent[-1] if recent else None)
+        return s
 
-    def read_new(self, stream_id: str, cursor: int, max_bytes: int) -> Tuple[str, int, bool]:
-        s = self._streams.get(stream_id)
-        if s is None or s.mode != "logfile" or not s.logfile_path:
+    def wait_for_change(self, stream: OutputStream, timeout_sec: float) -> None:
+        """Sleep up to timeout_sec, returning early when the logfile directory changes.
+
+        Without a change watcher (non-Windows, or lastprompt streams) this is a
+        plain sleep.
+        """
+
+        if timeout_sec <= 0:
+            return
+        watcher = stream.watcher
+        if watcher is None:
+            time.sleep(timeout_sec)
+            return
+        if watcher.wait(timeout_sec):
+            # The notification was consumed here: make the next read_new stat().
+            stream.stat_ts = 0.0
+
+    def read_new(
+        self,
+        stream_id: str,
+        cursor: int,
+        max_bytes: int,
+        *,
+        stream: Optional[OutputStream] = None,
+    ) -> Tuple[str, int, bool]:
+        """Read up to max_bytes of logfile output starting at cursor.
+
+        Callers that already hold the stream object (e.g. from get_default())
+        may pass it as `stream` to skip the id lookup.
+        """
+
+        if max_bytes <= 0:
+            return "", cursor, False
+        s = stream if stream is not None and stream.stream_id == stream_id else self._streams.get(stream_id)
+        if s is None:
             return "", cursor, False
+        return s.read_new(self, cursor, max_bytes)
 
-        path = s.logfile_path
-        if not os.path.exists(path):
+    def read_new_bytes(
+        self,
+        stream_id: str,
+        cursor: int,
+        max_bytes: int,
+        *,
+        stream: Optional[OutputStream] = None,
+    ) -> Tuple[bytes, int, bool]:
+        """Like read_new, but return the raw logfile bytes without decoding.
+
+        The stream's incremental decoder is not advanced, so a later read_new
+        starts decoding afresh at its cursor.
+        """
+
+        if max_bytes <= 0:
+            return b"", cursor, False
+        s = stream if stream is not None and stream.stream_id == stream_id else self._streams.get(stream_id)
+        if s is None:
+            return b"", cursor, False
+        return s.read_new_bytes(self, cursor, max_bytes)
+
+    def read_all_pending(self, stream_id: str, cursor: int, max_total_bytes: int = 1 << 20) -> Tuple[str, int, bool]:
+        """Read everything between cursor and the current end of the logfile.
+
+        One stat(), positional reads into a single buffer until caught up (or
+        max_total_bytes), then one decode and ring append. Returns the same
+        (text, new_cursor, truncated) triple as read_new.
+        """
+
+        s = self._streams.get(stream_id)
+        if type(s) is not LogfileStream or max_total_bytes <= 0:
+            return "", cursor, False
+        try:
+            st = os.stat(s.logfile_path)  # type: ignore[arg-type]
+        except OSError:
+            return "", cursor, False
+        file_size = st.st_size
+        cursor = min(cursor, file_size)
+        total = min(file_size - cursor, max_total_bytes)
+        if total <= 0:
             return "", cursor, False
+        f = self._logfile_handle(s, st)
+        if f is None:
+            return "", cursor, False
+
+        if len(s.readbuf) < total:
+            s.readbuf = bytearray(total)
+        mv = memoryview(s.readbuf)
+        try:
+            got = 0
+            while got < total:
+                n = self._pread_into(f, mv[got:total], cursor + got)
+                if n <= 0:
+                    break
+                got += n
+            s.known_size = file_size
+            s.stat_ts = time.monotonic()
+            return self._consume_chunk(s, mv[:got], cursor, file_size, total == max_total_bytes)  # type: ignore[return-value]
+        finally:
+            mv.release()
+
+    def read_new_many(self, requests: List[Tuple[str, int, int]]) -> List[Tuple[str, int, bool]]:
+        """Batch form of read_new: [(stream_id, cursor, max_bytes), ...].
+
+        Streams usually share AutoCAD's single LOGFILENAME, so the file is
+        stat'ed once per distinct path. When the requested ranges on one file
+        overlap, they are served by a single read and sliced per stream.
+        """
+
+        out: List[Tuple[str, int, bool]] = [("", cursor, False) for _sid, cursor, _mb in requests]
+        groups: Dict[str, List[Tuple[int, OutputStream, int, int]]] = {}
+        for idx, (stream_id, cursor, max_bytes) in enumerate(requests):
+            s = self._streams.get(stream_id)
+            if max_bytes <= 0 or type(s) is not LogfileStream:
+                continue
+            groups.setdefault(s.logfile_path, []).append((idx, s, cursor, max_bytes))  # type: ignore[arg-type]
 
-        file_size = os.path.getsize(path)
+        for path, reqs in groups.items():
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            if len(reqs) == 1:
+                idx, s, cursor, max_bytes = reqs[0]
+                out[idx] = self._read_new_at(s, st, cursor, max_bytes)
+                continue
+
+            size = st.st_size
+            spans = []
+            for idx, s, cursor, max_bytes in reqs:
+                cur = min(cursor, size)
+                spans.append((idx, s, cur, min(max_bytes, size - cur), max_bytes))
+            live = [sp for sp in spans if sp[3] > 0]
+            if not live:
+                for idx, _s, cur, _n, _mb in spans:
+                    out[idx] = ("", cur, False)
+                continue
+            lo = min(sp[2] for sp in live)
+            hi = max(sp[2] + sp[3] for sp in live)
+            f = self._logfile_handle(live[0][1], st)
+            if hi - lo > sum(sp[3] for sp in live) or f is None:
+                # Mostly disjoint ranges: one read per stream is cheaper.
+                for idx, s, cursor, max_bytes in reqs:
+                    out[idx] = self._read_new_at(s, st, cursor, max_bytes)
+                continue
+
+            shared = bytearray(hi - lo)
+            with memoryview(shared) as mv:
+                n = self._pread_into(f, mv, lo)
+                for idx, s, cur, to_read, max_bytes in spans:
+                    if to_read <= 0:
+                        out[idx] = ("", cur, False)
+                        continue
+                    start = cur - lo
+                    avail = max(0, min(to_read, n - start))
+                    out[idx] = self._consume_chunk(s, mv[start : start + avail], cur, size, to_read == max_bytes)
+        return out
+
+    def _read_new_at(
+        self, s: OutputStream, st: os.stat_result, cursor: int, max_bytes: int, *, decode: bool = True
+    ) -> Tuple[Union[str, bytes], int, bool]:
+        file_size = st.st_size
+        empty = "" if decode else b""
+
+        if cursor == file_size:
+            return empty, cursor, False
         if cursor > file_size:
             cursor = file_size
 
         to_read = min(max_bytes, file_size - cursor)
         if to_read <= 0:
-            return "", cursor, False
-
-        with open(path, "rb") as f:
-            f.seek(cursor)
-            data = f.read(to_read)
-        new_cursor = cursor + len(data)
-        truncated = new_cursor < file_size and len(data) == max_bytes
+            return empty, cursor, False
+        # Only a read capped by max_bytes can leave data behind.
+        capped = to_read == max_bytes
 
-        enc = _preferred_text_encoding()
+        f = self._logfile_handle(s, st)
+        if f is None:
+            return empty, cursor, False
+        if len(s.readbuf) < to_read:
+            s.readbuf = bytearray(to_read)
+        mv = memoryview(s.readbuf)
         try:
-            text = data.decode(enc, errors="replace")
-        except Exception:
-            text = data.decode("utf-8", errors="replace")
+            n = self._pread_into(f, mv[:to_read], cursor)
+            return self._consume_chunk(s, mv[:n], cursor, file_size, capped, decode=decode)
+        finally:
+            # Release the export so readbuf can be resized on a later call.
+            mv.release()
 
-        if text:
-            s.ring.append(text)
-            s.cursor = new_cursor
+    def _consume_chunk(
+        self, s: OutputStream, data: memoryview, cursor: int, file_size: int, capped: bool, *, decode: bool = True
+    ) -> Tuple[Union[str, bytes], int, bool]:
+        """Decode a chunk read at cursor, record it in the ring and advance the stream."""
 
-        return text, new_cursor, truncated
+        n = len(data)
+        new_cursor = cursor + n
+        truncated = capped and new_cursor < file_size
+        out = self._decode_chunk(s, data, cursor) if decode else bytes(data)
+        if n:
+            self._ring_append(s, data)
+            s.cursor = new_cursor
+        return out, new_cursor, truncated
 
     def read_tail(self, stream_id: str, tail_bytes: int = 8192) -> str:
         s = self._streams.get(stream_id)
-        if s is None or s.mode != "logfile" or not s.logfile_path:
+        if type(s) is not LogfileStream:
             return ""
         path = s.logfile_path
-        if not os.path.exists(path):
+        try:
+            st = os.stat(path)
+        except OSError:
             return ""
-        size = os.path.getsize(path)
+        size = st.st_size
         start = max(0, size - tail_bytes)
-        with open(path, "rb") as f:
-            f.seek(start)
-            data = f.read(size - start)
-        enc = _preferred_text_encoding()
+        f = self._logfile_handle(s, st)
+        if f is None:
+            return ""
+        data = b""
+        if size - start >= _MMAP_TAIL_MIN_BYTES:
+            # The map is released immediately: a live mapping would stop AutoCAD
+            # from truncating/recreating its logfile on Windows.
+            try:
+                with mmap.mmap(f.fileno(), length=size, access=mmap.ACCESS_READ) as mm:
+                    data = mm[start:size]
+            except (OSError, ValueError):
+                data = b""
+        if not data:
+            data = self._pread(f, size - start, start)
+        return self._decode(data)
+
+    def read_from_last_marker(
+        self,
+        stream_id: str,
+        marker: bytes,
+        max_scan: int = 256 * 1024,
+        chunk_bytes: int = 64 * 1024,
+        *,
+        min_offset: int = 0,
+    ) -> str:
+        """Return the logfile text from the last occurrence of `marker` to EOF.
+
+        Scans backwards from the end in chunk_bytes steps, reading at most
+        max_scan bytes and nothing before `min_offset`; returns "" if the
+        marker is not found in that window.
+        """
+
+        s = self._streams.get(stream_id)
+        if type(s) is not LogfileStream or not marker:
+            return ""
         try:
-            return data.decode(enc, errors="replace")
-        except Exception:
-            return data.decode("utf-8", errors="replace")
+            st = os.stat(s.logfile_path)  # type: ignore[arg-type]
+        except OSError:
+            return ""
+        size = st.st_size
+        f = self._logfile_handle(s, st)
+        if f is None:
+            return ""
+
+        floor = max(0, size - max_scan, min_offset)
+        pos = size
+        # Bytes from pos to EOF already read; the marker may straddle chunks.
+        tail = b""
+        while pos > floor:
+            start = max(floor, pos - chunk_bytes)
+            tail = self._pread(f, pos - start, start) + tail
+            pos = start
+            idx = tail.rfind(marker)
+            if idx >= 0:
+                return self._decode(tail[idx:])
+        return ""
@@ -1,21 +1,32 @@
+import contextlib
+import hashlib
+import itertools
 import os
-import json
+import re
 import time
 
 import uuid
-from dataclasses import dataclass
-from typing import Any, Dict, List, Optional, Tuple
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, TypeVar
 
 from mcp.server.fastmcp import FastMCP, Context
 
+try:
+    import win32process  # type: ignore
+except Exception:  # pragma: no cover
+    win32process = None  # type: ignore
+
+from . import _jsonfast
 from .autocad_bridge import AutoCADBridge
 from .lisp import build_load_lisp_command, build_run_lisp_script, lisp_quote_string
-from .output_log import OutputStreamManager
+from .output_log import OutputStream, OutputStreamManager
 from .session_log import SessionLogger, iso_now
 
 
 DEFAULT_LOG_DIR = os.path.join(os.getcwd(), "logs", "acad-cmd")
 
+_T = TypeVar("_T")
+
 
 @dataclass
 class AppState:
@@ -23,6 +34,17 @@ class AppState:
     bridge: AutoCADBridge
     streams: OutputStreamManager
     audit: SessionLogger
+    # LISP library fingerprint -> (connection epoch, drawing) it was loaded into.
+    # AutoLISP definitions are per document, so either changing invalidates it.
+    lisp_libs: Dict[str, Tuple[int, Optional[str]]] = field(default_factory=dict)
+    # (monotonic time, connection epoch, label) of the last get_dwg_label() call.
+    dwg_cache: Tuple[float, int, Optional[str]] = (0.0, -1, None)
+    # Per-session counter for stream/marker/request ids (see _new_id).
+    id_counter: "itertools.count[int]" = field(default_factory=lambda: itertools.count(1))
+    # (monotonic time, connection epoch, (acadver, hwnd, pid)) for get_status.
+    status_cache: Optional[Tuple[float, int, Tuple[Optional[str], Optional[int], Optional[int]]]] = None
+    # (connection epoch, LOGFILENAME) last read or set by this server.
+    logfilename_cache: Optional[Tuple[int, str]] = None
 
 
 def _make_state() -> AppState:
@@ -42,33 +64,62 @@ state = _make_state()
 mcp = FastMCP("acad-cmd")
 
 
+def _new_id() -> str:
+    """Cheap unique id: session prefix + counter (no entropy/uuid formatting per call).
+
+    The prefix keeps ids distinct from earlier sessions' markers that may still
+    be in a reused AutoCAD logfile.
+    """
+
+    return f"{state.session_id[:8]}-{next(state.id_counter):x}"
+
+
 _MCP_JSON_MARKER = "[MCP:JSON]"
+_MCP_JSON_MARKER_BYTES = _MCP_JSON_MARKER.encode("ascii")
+# The payload is captured in a lookahead so the match itself is just the
+# marker: a second marker on the same line is still found, and only payloads
+# that start like an object are captured.
+_MCP_JSON_RE = re.compile(r"\[MCP:JSON\](?=[ \t]*(\{[^\r\n]*))")
+
+
+class _McpJsonMissing(RuntimeError):
+    """No MCP JSON marker in the output (e.g. the LISP call itself failed)."""
+
+
+class _McpJsonUnparsed(_McpJsonMissing):
+    """The last marker's payload is empty or not JSON."""
+
+
+class _McpLispError(RuntimeError):
+    """The LISP call ran and reported {"ok":false,"error":...}."""
+
+
+class _McpLibMissing(RuntimeError):
+    """A guarded library call found the library undefined; the call did not run."""
 
 
 def _extract_mcp_json(text: str) -> Dict[str, Any]:
     """Extract and parse the last MCP JSON marker from logfile output."""
 
     if not text:
-        raise RuntimeError("No output text to parse")
+        raise _McpJsonMissing("No output text to parse")
 
-    # Prefer line-based extraction: we intentionally print one marker per line.
-    last_line = None
-    for line in text.splitlines():
-        if _MCP_JSON_MARKER in line:
-            last_line = line
+    # We intentionally print one marker per line: the payload runs from the
+    # last marker to the end of its line.
+    idx = text.rfind(_MCP_JSON_MARKER)
+    if idx < 0:
+        raise _McpJsonMissing("MCP JSON marker not found in output")
 
-    if last_line is None:
-        raise RuntimeError("MCP JSON marker not found in output")
-
-    idx = last_line.rfind(_MCP_JSON_MARKER)
-    payload = last_line[idx + len(_MCP_JSON_MARKER) :].strip()
+    start = idx + len(_MCP_JSON_MARKER)
+    end = text.find("\n", start)
+    payload = text[start : end if end >= 0 else len(text)].strip()
     if not payload:
-        raise RuntimeError("MCP JSON marker present but payload is empty")
+        raise _McpJsonUnparsed("MCP JSON marker present but payload is empty")
 
     try:
-        obj = json.loads(payload)
+        obj = _jsonfast.loads(payload)
     except Exception as e:
-        raise RuntimeError(f"Failed to parse MCP JSON payload: {e}")
+        raise _McpJsonUnparsed(f"Failed to parse MCP JSON payload: {e}")
 
     if not isinstance(obj, dict):
         raise RuntimeError("MCP JSON payload is not an object")
@@ -84,15 +135,13 @@ def _extract_mcp_json_messages(text: str) -> List[Dict[str, Any]]:
     out: List[Dict[str, Any]] = []
     if not text:
         return out
-    for line in text.splitlines():
-        if _MCP_JSON_MARKER not in line:
-            continue
-        idx = line.rfind(_MCP_JSON_MARKER)
-        payload = line[idx + len(_MCP_JSON_MARKER) :].strip()
-        if not payload:
-            continue
+    # One regex scan over the whole buffer instead of splitting every line. A
+    # payload ends at the end of its line; a second marker on the same line
+    # makes the first payload unparsable, so the last marker per line wins.
+    loads = _jsonfast.loads
+    for m in _MCP_JSON_RE.finditer(text):
         try:
-            obj = json.loads(payload)
+            obj = loads(m.group(1).rstrip(" \t"))
         except Exception:
             continue
         if isinstance(obj, dict):
@@ -100,48 +149,26 @@ def _extract_mcp_json_messages(text: str) -> List[Dict[str, Any]]:
     return out
 
 
-def _consume_complete_lines(buf: str) -> Tuple[List[str], str]:
-    """Split buffer into complete lines and a remainder (no trailing newline)."""
-
-    if not buf:
-        return [], ""
-    last_nl = buf.rfind("\n")
-    if last_nl < 0:
-        return [], buf
-    chunk = buf[: last_nl + 1]
-    rest = buf[last_nl + 1 :]
-    return chunk.splitlines(), rest
-
-
 def _ensure_logfile_stream(ctx: Context) -> Optional[str]:
     """Ensure default output stream is a logfile stream; return temp stream_id if created."""
 
-    s = state.streams.get_default()
-    if s and s.mode == "logfile" and s.logfile_path:
+    if state.streams.default_logfile_path:
         return None
     r = start_logging(ctx, mode="logfile")
     return str(r.get("stream_id"))
 
 
-def _run_lisp_json(ctx: Context, expr: str, *, timeout_sec: float = 10.0) -> Dict[str, Any]:
-    """Run a LISP expr that prints one [MCP:JSON]{...} line."""
+@contextlib.contextmanager
+def _shared_logfile_stream(ctx: Context) -> Iterator[None]:
+    """Make sure a logfile stream is the default for the duration of the block.
+
+    A temporary stream is started only by the outermost block and stopped when
+    it exits, so nested/back-to-back LISP calls inside share it.
+    """
 
     temp_stream_id = _ensure_logfile_stream(ctx)
     try:
-        r = run_lisp(ctx, expr, wait=True, timeout_sec=timeout_sec)
-        log_block = r.get("log") or {}
-        text = str(log_block.get("text") or "")
-        try:
-            obj = _extract_mcp_json(text)
-        except Exception:
-            # Fallback: sometimes the logfile chunk returned by send_command()
-            # does not include the marker yet. Try the logfile tail.
-            tail = get_last_output(ctx, source="logfile")
-            obj = _extract_mcp_json(str(tail.get("text") or ""))
-        if obj.get("ok") is False:
-            msg = obj.get("error") or "Unknown AutoLISP error"
-            raise RuntimeError(str(msg))
-        return obj
+        yield
     finally:
         if temp_stream_id:
             try:
@@ -150,20 +177,126 @@ def _run_lisp_json(ctx: Context, expr: str, *, timeout_sec: float = 10.0) -> Dic
                 pass
 
 
+def _logfile_offset(stream: OutputStream) -> int:
+    """Offset new logfile output will be written at: the larger of cursor and size."""
+
+    try:
+        size = os.stat(stream.logfile_path).st_size if stream.logfile_path else 0
+    except OSError:
+        size = 0
+    return max(int(stream.cursor), size)
+
+
+def _own_lisp_output(r: Dict[str, Any]) -> str:
+    """Logfile text of a run_lisp result from its own start marker on ("" if absent).
+
+    The log block starts at the stream cursor, so it may also hold earlier,
+    unread output (including another call's [MCP:JSON] result).
+    """
+
+    text = str((r.get("log") or {}).get("text") or "")
+    start_line = f"[MCP:LISP id={r.get('marker_id')} start]"
+    cut = text.find(start_line)
+    return text[cut + len(start_line) :] if cut >= 0 else ""
+
+
+def _run_lisp_json(ctx: Context, expr: str, *, timeout_sec: float = 10.0) -> Dict[str, Any]:
+    """Run a LISP expr that prints one [MCP:JSON]{...} line."""
+
+    with _shared_logfile_stream(ctx):
+        # Output of this run can only start past this offset; anything before
+        # it (e.g. a previous call's result) must never be taken as ours.
+        s = state.streams.get_default()
+        floor = _logfile_offset(s) if s else 0
+        r = run_lisp(ctx, expr, wait=True, timeout_sec=timeout_sec)
+        text = _own_lisp_output(r)
+        obj: Optional[Dict[str, Any]] = None
+        if _MCP_JSON_MARKER in text:
+            try:
+                obj = _extract_mcp_json(text)
+            except _McpJsonUnparsed:
+                # The last marker can be the echo of our own LISP source (e.g.
+                # the library's emit helper) when the output itself is late.
+                obj = None
+        if obj is None:
+            # Fallback: sometimes the logfile chunk returned by send_command()
+            # does not include the marker yet. Scan back from the end of the
+            # logfile to the last marker (bounded, independent of log size),
+            # but not past the point where this run started writing. Without a
+            # marker of our own this raises _McpJsonMissing (e.g. the call
+            # failed before printing), never returns a stale result.
+            tail = (
+                state.streams.read_from_last_marker(s.stream_id, _MCP_JSON_MARKER_BYTES, min_offset=floor) if s else ""
+            )
+            obj = _extract_mcp_json(tail)
+        if obj.get("lib_missing") is True:
+            raise _McpLibMissing("MCP LISP library is not defined in this drawing")
+        if obj.get("ok") is False:
+            msg = obj.get("error") or "Unknown AutoLISP error"
+            raise _McpLispError(str(msg))
+        return obj
+
+
+def _lisp_progn(exprs: List[str]) -> str:
+    """Wrap exprs in one (progn ...) so AutoCAD reads and evaluates them from a single SendCommand."""
+
+    return "(progn " + "\n".join(e.strip() for e in exprs) + " (princ))\n"
+
+
+def _run_lisp_json_many(ctx: Context, expr: str, count: int, *, timeout_sec: float = 10.0) -> List[Dict[str, Any]]:
+    """Run a LISP expr that prints `count` [MCP:JSON]{...} lines; return them in order.
+
+    Per-line {"ok":false} results are returned rather than raised.
+    """
+
+    with _shared_logfile_stream(ctx):
+        s = state.streams.get_default()
+        floor = _logfile_offset(s) if s else 0
+        r = run_lisp(ctx, expr, wait=True, timeout_sec=timeout_sec)
+        msgs = _extract_mcp_json_messages(_own_lisp_output(r))
+        if len(msgs) < count and s is not None:
+            # Same late-output fallback as _run_lisp_json: rescan the logfile
+            # from this run's own start line (never before `floor`).
+            start_line = f"[MCP:LISP id={r.get('marker_id')} start]".encode("ascii")
+            tail = state.streams.read_from_last_marker(s.stream_id, start_line, min_offset=floor)
+            later = _extract_mcp_json_messages(tail)
+            if len(later) > len(msgs):
+                msgs = later
+        if any(m.get("lib_missing") is True for m in msgs):
+            raise _McpLibMissing("MCP LISP library is not defined in this drawing")
+        if not msgs:
+            raise _McpJsonMissing("MCP JSON marker not found in output")
+        if len(msgs) < count:
+            raise RuntimeError(f"Batch stopped after {len(msgs)} of {count} operations")
+        return msgs[-count:]
+
+
 _MCP_DICT_LISP_LIB = r"""(progn
-  (defun mcp--json-escape (s / i c out)
-        (setq out "")
-        (setq i 1)
-        (while (<= i (strlen s))
-          (setq c (substr s i 1))
-          (cond
-            ((= c "\\") (setq out (strcat out "\\\\")))
-            ((= c "\"") (setq out (strcat out "\\\"")))
-            (T (setq out (strcat out c)))
-          )
-          (setq i (+ i 1))
+  (defun mcp--str-replace-all (new old s / i)
+        ;; vl-string-subst only replaces the first match; walk past each one.
+        (setq i 0)
+        (while (setq i (vl-string-search old s i))
+          (setq s (vl-string-subst new old s i))
+          (setq i (+ i (strlen new)))
+        )
+        s
+      )
+
+      (defun mcp--json-escape (s)
+        (setq s (mcp--str-replace-all "\\\"" "\"" (mcp--str-replace-all "\\\\" "\\" s)))
+        ;; Raw control characters would break the JSON and the one-record-per-line
+        ;; framing; each replace is a single search when the character is absent.
+        (setq s (mcp--str-replace-all "\\n" "\n" s))
+        (setq s (mcp--str-replace-all "\\r" "\r" s))
+        (mcp--str-replace-all "\\t" "\t" s)
+      )
+
+      (defun mcp--join (strs sep)
+        ;; Join a list of strings with one strcat call (no quadratic accumulation).
+        (if strs
+          (apply 'strcat (cons (car strs) (apply 'append (mapcar '(lambda (x) (list sep x)) (cdr strs)))))
+          ""
         )
-        out
       )
 
       (defun mcp--json-quote (s)
@@ -176,31 +309,22 @@ _MCP_DICT_LISP_LIB = r"""(progn
         (if (= s "") "0" s)
       )
 
-      (defun mcp--json-value (v)
+      (defun mcp--json-value (v / tv)
+        (setq tv (type v))
         (cond
-          ((= v T) "true")
-          ((= v nil) "false")
-          ((and (= (type v) 'SYM) (= (strcase (vl-symbol-name v)) "MCPNULL")) "null")
-          ((= (type v) 'STR) (mcp--json-quote v))
-          ((= (type v) 'INT) (itoa v))
-          ((= (type v) 'REAL) (mcp--json-real v))
-          ((= (type v) 'LIST) (mcp--json-arr v))
+          ((eq v T) "true")
+          ((null v) "false")
+          ((eq tv 'STR) (mcp--json-quote v))
+          ((eq tv 'INT) (itoa v))
+          ((eq tv 'REAL) (mcp--json-real v))
+          ((eq tv 'LIST) (mcp--json-arr v))
+          ((and (eq tv 'SYM) (= (strcase (vl-symbol-name v)) "MCPNULL")) "null")
           (T (mcp--json-quote (vl-princ-to-string v)))
         )
       )
 
-      (defun mcp--json-arr (lst / out first)
-        (setq out "[")
-        (setq first T)
-        (foreach v lst
-          (if first
-            (setq first nil)
-            (setq out (strcat out ","))
-          )
-          (setq out (strcat out (mcp--json-value v)))
-        )
-        (setq out (strcat out "]"))
-        out
+      (defun mcp--json-arr (lst)
+        (strcat "[" (mcp--join (mapcar 'mcp--json-value lst) ",") "]")
       )
 
       (defun mcp--emit-json (json)
@@ -220,7 +344,7 @@ _MCP_DICT_LISP_LIB = r"""(progn
 
       (defun mcp--is-system-name (name / u)
         (setq u (strcase name))
-        (or (wcmatch u "ACAD_*") (wcmatch u "AEC_*") (wcmatch u "ADSK_*") (wcmatch u "A$*"))
+        (wcmatch u "ACAD_*,AEC_*,ADSK_*,A$*")
       )
 
       (defun mcp--dict-by-name (name / nod r)
@@ -232,26 +356,18 @@ _MCP_DICT_LISP_LIB = r"""(progn
         )
       )
 
-      (defun mcp--dict-entry-pairs (d / el out key)
+      (defun mcp--dict-entry-pairs (d / k out)
         ;; Returns list of (key . ename) from DICTIONARY entity list.
-        (setq el (entget d))
+        ;; One pass: a 3 (key) is paired with the next 350 (entry).
+        (setq k nil)
         (setq out nil)
-        (while el
-          (if (= (caar el) 3)
-            (progn
-              (setq key (cdar el))
-              (setq el (cdr el))
-              (while (and el (/= (caar el) 350))
-                (setq el (cdr el))
-              )
-              (if el
-                (progn
-                  (setq out (cons (cons key (cdar el)) out))
-                  (setq el (cdr el))
-                )
-              )
+        (foreach kv (entget d)
+          (cond
+            ((= (car kv) 3) (setq k (cdr kv)))
+            ((and k (= (car kv) 350))
+              (setq out (cons (cons k (cdr kv)) out))
+              (setq k nil)
             )
-            (setq el (cdr el))
           )
         )
         (reverse out)
@@ -282,12 +398,7 @@ _MCP_DICT_LISP_LIB = r"""(progn
         (foreach p pairs
           (if (and (numberp (car p))
                    (>= (car p) 1)
-                   (/= (car p) 5)
-                   (/= (car p) 100)
-                   (/= (car p) 102)
-                   (/= (car p) 280)
-                   (/= (car p) 330)
-                   (/= (car p) 360))
+                   (not (member (car p) '(5 100 102 280 330 360))))
             (setq out (cons p out))
           )
         )
@@ -299,26 +410,22 @@ _MCP_DICT_LISP_LIB = r"""(progn
         (mcp--xrec-filter-pairs pairs)
       )
 
-      (defun mcp--json-xrec-values (pairs / out first)
+      (defun mcp--json-xrec-values (pairs)
         ;; pairs: list of (code . value) -> JSON [[code,value],...]
-        (setq out "[")
-        (setq first T)
-        (foreach p pairs
-          (if first
-            (setq first nil)
-            (setq out (strcat out ","))
+        (strcat
+          "["
+          (mcp--join
+            (mapcar '(lambda (p) (strcat "[" (itoa (car p)) "," (mcp--json-value (cdr p)) "]")) pairs)
+            ","
           )
-          (setq out (strcat out "[" (itoa (car p)) "," (mcp--json-value (cdr p)) "]"))
+          "]"
         )
-        (setq out (strcat out "]"))
-        out
       )
 
-      (defun mcp--dicts-json (/ nod it out first name obj etype isSys reason)
+      (defun mcp--dicts-json (/ nod it parts name obj etype isSys reason)
         (setq nod (mcp--nod))
         (setq it (mcp--dict-entry-pairs nod))
-        (setq out "[")
-        (setq first T)
+        (setq parts nil)
         (foreach kv it
           (setq name (car kv))
           (setq obj (cdr kv))
@@ -327,55 +434,49 @@ _MCP_DICT_LISP_LIB = r"""(progn
             (progn
               (setq isSys (mcp--is-system-name name))
               (setq reason (if isSys "prefix" 'MCPNULL))
-              (if first
-                (setq first nil)
-                (setq out (strcat out ","))
-              )
-              (setq out
-                (strcat out
-                  "{\"name\":" (mcp--json-value name)
-                  ",\"is_system_guess\":" (mcp--json-value isSys)
-                  ",\"system_reason\":" (mcp--json-value reason)
-                  "}"
+              (setq parts
+                (cons
+                  (strcat
+                    "{\"name\":" (mcp--json-value name)
+                    ",\"is_system_guess\":" (mcp--json-value isSys)
+                    ",\"system_reason\":" (mcp--json-value reason)
+                    "}"
+                  )
+                  parts
                 )
               )
             )
           )
         )
-        (setq out (strcat out "]"))
-        out
+        (strcat "[" (mcp--join (reverse parts) ",") "]")
       )
 
       (defun mcp-dict-list ()
         (mcp--emit-json (strcat "{\"ok\":true,\"dicts\":" (mcp--dicts-json) "}"))
       )
 
-      (defun mcp-dict-keys (dictName / d it entries keys first k obj etype)
+      (defun mcp-dict-keys (dictName / d it entries keys k kj obj etype)
         (setq d (mcp--dict-by-name dictName))
         (if (not d)
           (mcp--emit-json "{\"ok\":true,\"found\":false,\"keys\":[],\"entries\":[]}")
           (progn
             (setq it (mcp--dict-entry-pairs d))
-            (setq entries "[")
-            (setq keys "[")
-            (setq first T)
+            (setq entries nil)
+            (setq keys nil)
             (foreach kv it
               (setq k (car kv))
               (setq obj (cdr kv))
               (setq etype (if obj (cdr (assoc 0 (entget obj))) 'MCPNULL))
-              (if first
-                (setq first nil)
-                (progn
-                  (setq entries (strcat entries ","))
-                  (setq keys (strcat keys ","))
-                )
+              (setq kj (mcp--json-value k))
+              (setq entries (cons (strcat "{\"key\":" kj ",\"type\":" (mcp--json-value etype) "}") entries))
+              (setq keys (cons kj keys))
+            )
+            (mcp--emit-json
+              (strcat
+                "{\"ok\":true,\"found\":true,\"keys\":[" (mcp--join (reverse keys) ",")
+                "],\"entries\":[" (mcp--join (reverse entries) ",") "]}"
               )
-              (setq entries (strcat entries "{\"key\":" (mcp--json-value k) ",\"type\":" (mcp--json-value etype) "}"))
-              (setq keys (strcat keys (mcp--json-value k)))
             )
-            (setq entries (strcat entries "]"))
-            (setq keys (strcat keys "]"))
-            (mcp--emit-json (strcat "{\"ok\":true,\"found\":true,\"keys\":" keys ",\"entries\":" entries "}"))
           )
         )
       )
@@ -475,6 +576,80 @@ _MCP_DICT_LISP_LIB = r"""(progn
 """
 
 
+def _lisp_lib_fp(lib: str) -> str:
+    return hashlib.sha256(lib.encode("utf-8")).hexdigest()[:12]
+
+
+_MCP_DICT_LISP_LIB_FP = _lisp_lib_fp(_MCP_DICT_LISP_LIB)
+
+
+def _lisp_lib_key() -> Tuple[int, Optional[str]]:
+    return (state.bridge.connection_epoch, state.bridge.get_dwg_label())
+
+
+def _lisp_lib_loaded(fp: str, key: Tuple[int, Optional[str]]) -> bool:
+    return state.lisp_libs.get(fp) == key
+
+
+def _mark_lisp_lib(fps: Tuple[str, ...], key: Optional[Tuple[int, Optional[str]]]) -> None:
+    for fp in fps:
+        if key is None:
+            state.lisp_libs.pop(fp, None)
+        else:
+            state.lisp_libs[fp] = key
+
+
+def _guard_lib_call(call: str) -> str:
+    """Wrap a library call so it only runs if the library is still defined.
+
+    Otherwise it prints {"ok":false,"lib_missing":true} (the marker is split
+    in the source so the command echo never looks like a result).
+    """
+
+    return (
+        "(if (boundp 'mcp--emit-json) (progn\n"
+        + call.strip()
+        + '\n) (progn (prompt (strcat "\\n[MCP:" "JSON]{\\"ok\\":false,\\"lib_missing\\":true}")) (princ)))\n'
+    )
+
+
+def _run_with_dict_lib(ctx: Context, run: Callable[[Context, str], _T], call: str) -> _T:
+    """Run a dict library call via `run`, defining the library first if needed.
+
+    The library is sent once per (connection, drawing), in the same
+    SendCommand as the first call. Later calls are guarded: if the definitions
+    are gone (e.g. the drawing was reopened) the call does not run and is
+    re-sent once with the library prepended. Any other failure (late output,
+    a timeout, a lost connection) is raised, never retried, since the call
+    may already have run.
+    """
+
+    fps = (_MCP_DICT_LISP_LIB_FP,)
+    key = _lisp_lib_key()
+    loaded = _lisp_lib_loaded(_MCP_DICT_LISP_LIB_FP, key)
+    # One logfile stream for the call and a possible retry.
+    with _shared_logfile_stream(ctx):
+        try:
+            result = run(ctx, _guard_lib_call(call) if loaded else _lisp_concat(_MCP_DICT_LISP_LIB, call))
+        except _McpLibMissing:
+            _mark_lisp_lib(fps, None)
+            try:
+                result = run(ctx, _lisp_concat(_MCP_DICT_LISP_LIB, call))
+            except _McpLispError:
+                _mark_lisp_lib(fps, key)
+                raise
+        except _McpLispError:
+            # A parsed {"ok":false} result: the library itself did get defined.
+            _mark_lisp_lib(fps, key)
+            raise
+    _mark_lisp_lib(fps, key)
+    return result
+
+
+def _run_dict_lisp_json(ctx: Context, call: str) -> Dict[str, Any]:
+    return _run_with_dict_lib(ctx, _run_lisp_json, call)
+
+
 _MCP_SELECTION_LISP_LIB = _MCP_DICT_LISP_LIB + r"""(progn
   (vl-load-com)
 
@@ -512,7 +687,7 @@ _MCP_SELECTION_LISP_LIB = _MCP_DICT_LISP_LIB + r"""(progn
         )
       )
 
-      (defun mcp-selection--emit-from-ss-lite (req_id ss max_objects / errno total n i ename el handle etype)
+      (defun mcp-selection--emit-from-ss-lite (req_id ss max_objects / errno total n i ename el pre buf)
         (setq errno (getvar "ERRNO"))
         (setq total (if ss (sslength ss) 0))
         (setq n total)
@@ -520,15 +695,33 @@ _MCP_SELECTION_LISP_LIB = _MCP_DICT_LISP_LIB + r"""(progn
           (setq n max_objects)
         )
         (mcp--emit-sel-start req_id n errno)
+        ;; item_begin records go out 64 per (prompt ...) call, one marker line each.
+        (setq pre (strcat "\n[MCP:JSON]{\"ok\":true,\"req_id\":" (mcp--json-value req_id) ",\"event\":\"item_begin\",\"i\":"))
+        (setq buf nil)
         (setq i 0)
         (while (< i n)
           (setq ename (ssname ss i))
           (setq el (entget ename))
-          (setq handle (cdr (assoc 5 el)))
-          (setq etype (cdr (assoc 0 el)))
-          (mcp--emit-sel-item-begin-lite req_id i handle etype)
+          (setq buf
+            (cons
+              (strcat
+                pre (itoa i)
+                ",\"handle\":" (mcp--json-value (cdr (assoc 5 el)))
+                ",\"type\":" (mcp--json-value (cdr (assoc 0 el)))
+                "}"
+              )
+              buf
+            )
+          )
           (setq i (+ i 1))
+          (if (= (rem i 64) 0)
+            (progn
+              (prompt (apply 'strcat (reverse buf)))
+              (setq buf nil)
+            )
+          )
         )
+        (if buf (prompt (apply 'strcat (reverse buf))))
         (mcp--emit-sel-done req_id)
       )
 
@@ -552,6 +745,19 @@ _MCP_SELECTION_LISP_LIB = _MCP_DICT_LISP_LIB + r"""(progn
 """
 
 
+# Joined with call sites the way _lisp_concat would, computed once at import.
+_MCP_SELECTION_LISP_PREFIX = _MCP_SELECTION_LISP_LIB.rstrip("\r\n") + "\n"
+_MCP_SELECTION_LISP_LIB_FP = _lisp_lib_fp(_MCP_SELECTION_LISP_LIB)
+# The selection library embeds the dict library, so loading it defines both.
+_MCP_SELECTION_LISP_FPS = (_MCP_SELECTION_LISP_LIB_FP, _MCP_DICT_LISP_LIB_FP)
+
+
+def _selection_expr(call: str, key: Tuple[int, Optional[str]]) -> str:
+    if _lisp_lib_loaded(_MCP_SELECTION_LISP_LIB_FP, key):
+        return call
+    return _MCP_SELECTION_LISP_PREFIX + call
+
+
 def _collect_selection_stream_lite(
     ctx: Context,
     *,
@@ -572,15 +778,25 @@ def _collect_selection_stream_lite(
         raise RuntimeError("No active logfile stream")
 
     cur = int(cursor if cursor is not None else stream.cursor)
-    buf = ""
+    buf = b""
+    # Lines are decoded and parsed only once they mention this request.
+    req_bytes = req_id.encode("ascii")
 
     started: Optional[Dict[str, Any]] = None
     items: Dict[int, Dict[str, Any]] = {}
-    order: List[int] = []
+    # Items normally arrive with increasing i; then insertion order is the
+    # final order and no sort is needed.
+    last_i = -1
+    in_order = True
     timed_out = False
 
+    def _objects() -> List[Dict[str, Any]]:
+        if in_order:
+            return list(items.values())
+        return [items[i] for i in sorted(items)]
+
     def _handle_msgs(msgs: List[Dict[str, Any]]) -> bool:
-        nonlocal started
+        nonlocal started, last_i, in_order
         for m in msgs:
             if not isinstance(m, dict):
                 continue
@@ -593,12 +809,13 @@ def _collect_selection_stream_lite(
                 started = m
             elif ev == "item_begin":
                 i = int(m.get("i") or 0)
+                if i <= last_i:
+                    in_order = False
+                last_i = max(last_i, i)
                 items[i] = {
                     "handle": m.get("handle"),
                     "type": m.get("type"),
                 }
-                if i not in order:
-                    order.append(i)
             elif ev == "done":
                 return True
         return False
@@ -608,7 +825,7 @@ def _collect_selection_stream_lite(
         msgs = _extract_mcp_json_messages(initial_text)
         if _handle_msgs(msgs):
             started_local = started
-            objs = [items[i] for i in sorted(order)]
+            objs = _objects()
             count = None
             errno = None
             if isinstance(started_local, dict):
@@ -629,25 +846,33 @@ def _collect_selection_stream_lite(
                 "cursor": cur,
             }
 
-    t0 = time.time()
+    deadline_ns = time.monotonic_ns() + int(timeout_sec * 1_000_000_000)
     while True:
-        if time.time() - t0 >= timeout_sec:
+        remaining_ns = deadline_ns - time.monotonic_ns()
+        if remaining_ns <= 0:
             timed_out = True
             break
 
-        text, new_cursor, _tr = state.streams.read_new(stream.stream_id, cur, max_bytes)
+        data, new_cursor, _tr = state.streams.read_new_bytes(stream.stream_id, cur, max_bytes, stream=stream)
         cur = int(new_cursor)
-        if text:
-            buf += text
-            lines, buf = _consume_complete_lines(buf)
-            if lines:
-                msgs = _extract_mcp_json_messages("\n".join(lines))
-                if _handle_msgs(msgs):
-                    break
+        if data:
+            # Only a trailing partial line is carried between polls; complete
+            # lines are handled straight from this poll's bytes (no split/join).
+            chunk = buf + data if buf else data
+            last_nl = chunk.rfind(b"\n")
+            if last_nl < 0:
+                buf = chunk
+            else:
+                buf = chunk[last_nl + 1 :]
+                if chunk.find(req_bytes, 0, last_nl) >= 0:
+                    text = state.streams.decode(chunk[: last_nl + 1])
+                    if _handle_msgs(_extract_mcp_json_messages(text)):
+                        break
         else:
-            time.sleep(poll_interval_sec)
+            # Wakes as soon as the logfile's directory reports a write.
+            state.streams.wait_for_change(stream, min(poll_interval_sec, remaining_ns / 1e9))
 
-    objs = [items[i] for i in sorted(order)]
+    objs = _objects()
 
     count = None
     errno = None
@@ -694,7 +919,8 @@ def _lisp_typed_values(values: Any) -> str:
     if not isinstance(values, list):
         raise ValueError("values must be a list")
 
-    parts: list[str] = []
+    out: list[str] = ["(list"]
+    append = out.append
     for i, item in enumerate(values):
         if not isinstance(item, dict):
             raise ValueError(f"values[{i}] must be an object")
@@ -706,36 +932,32 @@ def _lisp_typed_values(values: Any) -> str:
             raise ValueError(f"values[{i}].code must be integer")
 
         if isinstance(val, str):
-            v = _lisp_string(val)
+            append(' (cons %d "%s")' % (code, lisp_quote_string(val)))
         elif isinstance(val, bool):
-            v = "T" if val else "nil"
-        elif isinstance(val, int) or isinstance(val, float):
-            v = str(val)
+            append(" (cons %d T)" % code if val else " (cons %d nil)" % code)
+        elif isinstance(val, (int, float)):
+            append(" (cons %d %s)" % (code, val))
         elif isinstance(val, (list, tuple)):
             # Point/list of numbers
-            nums: list[str] = []
             for j, n in enumerate(val):
                 if not isinstance(n, (int, float)):
                     raise ValueError(f"values[{i}].value[{j}] must be number")
-                nums.append(str(float(n)))
-            v = "(" + " ".join(nums) + ")"
+            append(" (cons %d (%s))" % (code, " ".join(map(repr, map(float, val)))))
         elif val is None:
             # No 'null' in LISP, store as empty string marker
-            v = "nil"
+            append(" (cons %d nil)" % code)
         else:
             raise ValueError(f"values[{i}].value has unsupported type")
 
-        parts.append(f"(cons {code} {v})")
-
-    return "(list " + " ".join(parts) + ")"
+    append(")")
+    return "".join(out)
 
 
 def _strip_ok(obj: Dict[str, Any]) -> Dict[str, Any]:
-    if "ok" not in obj:
-        return obj
-    out = dict(obj)
-    out.pop("ok", None)
-    return out
+    """Drop the "ok" flag in place (callers own the freshly parsed result dict)."""
+
+    obj.pop("ok", None)
+    return obj
 
 
 def _ensure_connected() -> None:
@@ -744,43 +966,97 @@ def _ensure_connected() -> None:
         raise RuntimeError("Failed to connect to AutoCAD via COM")
 
 
+_DWG_LABEL_TTL_SEC = 0.25
+
+
+def _cached_dwg_label() -> Optional[str]:
+    """Drawing label for audit/results, refreshed at most every _DWG_LABEL_TTL_SEC."""
+
+    now = time.monotonic()
+    epoch = state.bridge.connection_epoch
+    ts, cached_epoch, label = state.dwg_cache
+    if cached_epoch == epoch and now - ts < _DWG_LABEL_TTL_SEC:
+        return label
+    label = state.bridge.get_dwg_label()
+    state.dwg_cache = (now, epoch, label)
+    return label
+
+
+def _invalidate_dwg_label() -> None:
+    state.dwg_cache = (0.0, -1, None)
+
+
 def _default_logfile_path() -> str:
     return os.path.join(state.streams.base_dir, "acad-commandline.log")
 
 
 def _get_current_logfilename() -> Optional[str]:
+    """AutoCAD's LOGFILENAME, cached per connection once it is non-empty.
+
+    The server updates the cache whenever it sets LOGFILENAME itself; an empty
+    value is not cached because AutoCAD may fill it in once LOGFILEMODE is on.
+    """
+
+    epoch = state.bridge.connection_epoch
+    cached = state.logfilename_cache
+    if cached is not None and cached[0] == epoch:
+        return cached[1]
     try:
         v = state.bridge.get_variable("LOGFILENAME")
         s = str(v) if v is not None else ""
-        return s or None
     except Exception:
         return None
+    if s:
+        state.logfilename_cache = (epoch, s)
+    return s or None
+
+
+_STATUS_TTL_SEC = 1.0
+
+
+def _acad_process_info() -> Tuple[Optional[str], Optional[int], Optional[int]]:
+    """(ACADVER, main window handle, PID), re-read over COM at most once per _STATUS_TTL_SEC.
+
+    These are fixed for a given AutoCAD instance, so the snapshot is keyed on the
+    bridge connection epoch and dropped on reconnect.
+    """
+
+    now = time.monotonic()
+    epoch = state.bridge.connection_epoch
+    cached = state.status_cache
+    if cached is not None and cached[1] == epoch and now - cached[0] < _STATUS_TTL_SEC:
+        return cached[2]
+
+    v = state.bridge.get_variables(("ACADVER",)).get("ACADVER")
+    acadver = str(v) if v is not None else None
+    try:
+        hwnd: Optional[int] = int(getattr(state.bridge.acad, "HWND", 0) or 0)
+    except Exception:
+        hwnd = None
+    pid = None
+    if hwnd and cached is not None and cached[1] == epoch and cached[2][1] == hwnd:
+        # Same window in the same connection: the owning process cannot change.
+        pid = cached[2][2]
+    elif hwnd and win32process is not None:
+        try:
+            _tid, pidv = win32process.GetWindowThreadProcessId(hwnd)
+            pid = int(pidv)
+        except Exception:
+            pid = None
+    info = (acadver, hwnd, pid)
+    state.status_cache = (now, epoch, info)
+    return info
 
 
 @mcp.tool()
 def get_status(ctx: Context) -> Dict[str, Any]:
     connected = state.bridge.ensure_connection()
-    dwg = state.bridge.get_dwg_label() if connected else None
+    dwg = _cached_dwg_label() if connected else None
     acadver = None
     hwnd = None
     pid = None
     if connected:
-        try:
-            acadver = str(state.bridge.get_variable("ACADVER"))
-        except Exception:
-            acadver = None
-        try:
-            hwnd = int(getattr(state.bridge.acad, "HWND", 0) or 0)
-        except Exception:
-            hwnd = None
-        if hwnd:
-            try:
-                import win32process
-
-                _tid, pidv = win32process.GetWindowThreadProcessId(hwnd)
-                pid = int(pidv)
-            except Exception:
-                pid = None
+        acadver, hwnd, pid = _acad_process_info()
     default_stream = state.streams.get_default()
     return {
         "ts": iso_now(),
@@ -790,6 +1066,7 @@ def get_status(ctx: Context) -> Dict[str, Any]:
         "acadver": acadver,
         "acad_hwnd": hwnd,
         "acad_pid": pid,
+        "audit": state.audit.stats(),
         "default_stream": (
             {
                 "stream_id": default_stream.stream_id,
@@ -814,8 +1091,8 @@ def start_logging(
     if mode not in ("logfile", "lastprompt"):
         raise ValueError("mode must be 'logfile' or 'lastprompt'")
 
-    stream_id = str(uuid.uuid4())
-    dwg = state.bridge.get_dwg_label()
+    stream_id = _new_id()
+    dwg = _cached_dwg_label()
 
     if mode == "lastprompt":
         # Logical stream for clients that only want LASTPROMPT.
@@ -827,9 +1104,8 @@ def start_logging(
     # If caller didn't provide a path, prefer AutoCAD's current LOGFILENAME.
     # This avoids issues where AutoCAD refuses to write to paths with
     # non-ASCII characters (common when the workspace path contains Cyrillic).
-    path = logfile_path
-    if not path:
-        path = _get_current_logfilename() or _default_logfile_path()
+    current = None if logfile_path else _get_current_logfilename()
+    path = logfile_path or current or _default_logfile_path()
 
     if path:
         try:
@@ -843,8 +1119,10 @@ def start_logging(
         # Only attempt to override LOGFILENAME if the user explicitly asked.
         try:
             state.bridge.set_variable("LOGFILENAME", path)
+            state.logfilename_cache = (state.bridge.connection_epoch, path)
             state.bridge.set_variable("LOGFILEMODE", 1)
         except Exception:
+            state.logfilename_cache = None
             # Fallback via AutoLISP setvar (some environments block COM SetVariable).
             path_norm = path.replace("\\", "/")
             lsp = "\n".join(
@@ -865,16 +1143,15 @@ def start_logging(
             except Exception:
                 pass
 
-    # Refresh the effective path (AutoCAD may normalize/override it).
-    if not logfile_path:
+    # AutoCAD may only report LOGFILENAME once LOGFILEMODE is on; re-read it
+    # if it was empty before (a non-empty value is kept as is).
+    if not logfile_path and not current:
         path = _get_current_logfilename() or path
 
-    cursor = 0
-    if not reset and os.path.exists(path):
-        try:
-            cursor = os.path.getsize(path)
-        except Exception:
-            cursor = 0
+    try:
+        cursor = 0 if reset else os.stat(path).st_size
+    except OSError:
+        cursor = 0
 
     state.streams.start_logfile_stream(
         stream_id=stream_id,
@@ -890,12 +1167,12 @@ def start_logging(
 @mcp.tool()
 def stop_logging(ctx: Context, stream_id: str) -> Dict[str, Any]:
     _ensure_connected()
-    s = state.streams.get(stream_id)
-    stopped = state.streams.stop(stream_id)
+    s = state.streams.stop_and_get(stream_id)
+    stopped = s is not None
 
     # Best-effort: if we stopped a logfile stream started by us and
     # there are no remaining logfile streams, disable AutoCAD logging.
-    if stopped and s and s.mode == "logfile" and s.started_by_server:
+    if s is not None and s.mode == "logfile" and s.started_by_server:
         remaining_logfile = False
         default_stream = state.streams.get_default()
         if default_stream and default_stream.mode == "logfile":
@@ -910,7 +1187,7 @@ def stop_logging(ctx: Context, stream_id: str) -> Dict[str, Any]:
                 except Exception:
                     pass
 
-    dwg = state.bridge.get_dwg_label()
+    dwg = _cached_dwg_label()
     state.audit.log("stop_logging", {"stream_id": stream_id, "stopped": stopped}, dwg=dwg)
     return {"stream_id": stream_id, "stopped": stopped}
 
@@ -924,7 +1201,7 @@ def get_new_output_since(
 ) -> Dict[str, Any]:
     _ensure_connected()
     text, new_cursor, truncated = state.streams.read_new(stream_id, cursor, max_bytes)
-    dwg = state.bridge.get_dwg_label()
+    dwg = _cached_dwg_label()
     state.audit.log(
         "get_new_output_since",
         {"stream_id": stream_id, "cursor": cursor, "new_cursor": new_cursor, "bytes": len(text)},
@@ -941,7 +1218,7 @@ def get_new_output_since(
 @mcp.tool()
 def get_last_output(ctx: Context, source: str = "lastprompt") -> Dict[str, Any]:
     _ensure_connected()
-    dwg = state.bridge.get_dwg_label()
+    dwg = _cached_dwg_label()
 
     if source == "logfile":
         s = state.streams.get_default()
@@ -965,14 +1242,28 @@ def send_command(
     poll_interval_sec: float = 0.1,
 ) -> Dict[str, Any]:
     _ensure_connected()
-    dwg = state.bridge.get_dwg_label()
+    return _send_command_impl(
+        command, wait=wait, timeout_sec=timeout_sec, poll_interval_sec=poll_interval_sec, dwg=_cached_dwg_label()
+    )
+
+
+def _send_command_impl(
+    command: str,
+    *,
+    wait: bool,
+    timeout_sec: float,
+    poll_interval_sec: float = 0.1,
+    dwg: Optional[str],
+) -> Dict[str, Any]:
+    """send_command body for callers that already checked the connection and hold `dwg`."""
+
     command_id = state.bridge.send_command(command)
+    request = {"command_id": command_id, "command": command, "wait": wait, "timeout_sec": timeout_sec}
 
-    state.audit.log(
-        "send_command",
-        {"command_id": command_id, "command": command, "wait": wait, "timeout_sec": timeout_sec},
-        dwg=dwg,
-    )
+    # With wait=True the result follows immediately, so one merged event is
+    # written after the wait; only fire-and-forget calls log the request alone.
+    if not wait:
+        state.audit.log("send_command", request, dwg=dwg)
 
     completed = True
     needs_input = False
@@ -981,6 +1272,8 @@ def send_command(
         wr = state.bridge.wait_for_idle(timeout_sec=timeout_sec, poll_interval_sec=poll_interval_sec)
         completed = wr.completed
         needs_input = wr.needs_input
+    # The command may have opened/switched drawings; refresh the label next time.
+    _invalidate_dwg_label()
 
     last_prompt = state.bridge.get_last_prompt()
 
@@ -988,7 +1281,7 @@ def send_command(
     stream = state.streams.get_default()
     log_block = None
     if stream and stream.mode == "logfile" and stream.logfile_path:
-        text, new_cursor, truncated = state.streams.read_new(stream.stream_id, stream.cursor, 65536)
+        text, new_cursor, truncated = state.streams.read_new(stream.stream_id, stream.cursor, 65536, stream=stream)
         log_block = {
             "stream_id": stream.stream_id,
             "cursor": new_cursor,
@@ -996,17 +1289,16 @@ def send_command(
             "truncated": truncated,
         }
 
-    state.audit.log(
-        "send_command_result",
-        {
-            "command_id": command_id,
-            "completed": completed,
-            "needs_input": needs_input,
-            "last_prompt": last_prompt,
-            "has_log": bool(log_block),
-        },
-        dwg=dwg,
-    )
+    result = {
+        "completed": completed,
+        "needs_input": needs_input,
+        "last_prompt": last_prompt,
+        "has_log": bool(log_block),
+    }
+    if wait:
+        state.audit.log("send_command", {**request, **result}, dwg=dwg)
+    else:
+        state.audit.log("send_command_result", {"command_id": command_id, **result}, dwg=dwg)
 
     return {
         "command_id": command_id,
@@ -1027,10 +1319,12 @@ def load_lisp_file(
     timeout_sec: float = 10.0,
 ) -> Dict[str, Any]:
     _ensure_connected()
-    dwg = state.bridge.get_dwg_label()
+    dwg = _cached_dwg_label()
     cmd = build_load_lisp_command(path)
-    state.audit.log("load_lisp_file", {"path": path, "command": cmd}, dwg=dwg)
-    return send_command(ctx, cmd, wait=wait, timeout_sec=timeout_sec)
+    # Loading code from disk is the audit record that must survive a crash:
+    # write it through before AutoCAD runs the file.
+    state.audit.log("load_lisp_file", {"path": path, "command": cmd}, dwg=dwg, durable=True)
+    return _send_command_impl(cmd, wait=wait, timeout_sec=timeout_sec, dwg=dwg)
 
 
 @mcp.tool()
@@ -1041,22 +1335,71 @@ def run_lisp(
     timeout_sec: float = 10.0,
 ) -> Dict[str, Any]:
     _ensure_connected()
-    dwg = state.bridge.get_dwg_label()
-    marker_id = str(uuid.uuid4())
+    dwg = _cached_dwg_label()
+    marker_id = _new_id()
     script = build_run_lisp_script(expr, marker_id)
     state.audit.log("run_lisp", {"expr": expr, "marker_id": marker_id}, dwg=dwg)
-    result = send_command(ctx, script, wait=wait, timeout_sec=timeout_sec)
+    result = _send_command_impl(script, wait=wait, timeout_sec=timeout_sec, dwg=dwg)
     result["marker_id"] = marker_id
     return result
 
 
+def _require(name: str, value: str) -> None:
+    if not value:
+        raise ValueError(f"{name} must be non-empty")
+
+
+def _dict_list_call() -> str:
+    return "(mcp-dict-list)\n"
+
+
+def _dict_keys_call(dict_name: str) -> str:
+    _require("dict_name", dict_name)
+    return f"(mcp-dict-keys {_lisp_string(dict_name)})\n"
+
+
+def _dict_xrecord_get_call(dict_name: str, key: str) -> str:
+    _require("dict_name", dict_name)
+    _require("key", key)
+    return f"(mcp-xrecord-get {_lisp_string(dict_name)} {_lisp_string(key)})\n"
+
+
+def _dict_xrecord_set_call(dict_name: str, key: str, values: Any, overwrite: bool = True) -> str:
+    _require("dict_name", dict_name)
+    _require("key", key)
+    values_expr = _lisp_typed_values(values)
+    ow = "T" if overwrite else "nil"
+    return f"(mcp-xrecord-set {_lisp_string(dict_name)} {_lisp_string(key)} {values_expr} {ow})\n"
+
+
+def _dict_xrecord_delete_call(dict_name: str, key: str) -> str:
+    _require("dict_name", dict_name)
+    _require("key", key)
+    return f"(mcp-xrecord-delete {_lisp_string(dict_name)} {_lisp_string(key)})\n"
+
+
+def _dict_delete_call(dict_name: str, recursive: bool = True) -> str:
+    _require("dict_name", dict_name)
+    rec = "T" if recursive else "nil"
+    return f"(mcp-dict-delete {_lisp_string(dict_name)} {rec})\n"
+
+
+_DICT_OP_CALLS: Dict[str, Callable[..., str]] = {
+    "dict_list": _dict_list_call,
+    "dict_keys": _dict_keys_call,
+    "dict_xrecord_get": _dict_xrecord_get_call,
+    "dict_xrecord_set": _dict_xrecord_set_call,
+    "dict_xrecord_delete": _dict_xrecord_delete_call,
+    "dict_delete": _dict_delete_call,
+}
+
+
 @mcp.tool()
 def dict_list(ctx: Context) -> Dict[str, Any]:
     """List top-level dictionaries from Named Objects Dictionary."""
 
     _ensure_connected()
-    expr = _lisp_concat(_MCP_DICT_LISP_LIB, "(mcp-dict-list)\n")
-    obj = _run_lisp_json(ctx, expr)
+    obj = _run_dict_lisp_json(ctx, _dict_list_call())
     return _strip_ok(obj)
 
 
@@ -1065,10 +1408,7 @@ def dict_keys(ctx: Context, dict_name: str) -> Dict[str, Any]:
     """List keys (and entry types) in a named dictionary."""
 
     _ensure_connected()
-    if not dict_name:
-        raise ValueError("dict_name must be non-empty")
-    expr = _lisp_concat(_MCP_DICT_LISP_LIB, f"(mcp-dict-keys {_lisp_string(dict_name)})\n")
-    obj = _run_lisp_json(ctx, expr)
+    obj = _run_dict_lisp_json(ctx, _dict_keys_call(dict_name))
     return _strip_ok(obj)
 
 
@@ -1077,15 +1417,7 @@ def dict_xrecord_get(ctx: Context, dict_name: str, key: str) -> Dict[str, Any]:
     """Read XRecord data from a named dictionary by key."""
 
     _ensure_connected()
-    if not dict_name:
-        raise ValueError("dict_name must be non-empty")
-    if not key:
-        raise ValueError("key must be non-empty")
-    expr = _lisp_concat(
-        _MCP_DICT_LISP_LIB,
-        f"(mcp-xrecord-get {_lisp_string(dict_name)} {_lisp_string(key)})\n",
-    )
-    obj = _run_lisp_json(ctx, expr)
+    obj = _run_dict_lisp_json(ctx, _dict_xrecord_get_call(dict_name, key))
     return _strip_ok(obj)
 
 
@@ -1100,17 +1432,7 @@ def dict_xrecord_set(
     """Write XRecord data into a named dictionary under key."""
 
     _ensure_connected()
-    if not dict_name:
-        raise ValueError("dict_name must be non-empty")
-    if not key:
-        raise ValueError("key must be non-empty")
-    values_expr = _lisp_typed_values(values)
-    ow = "T" if overwrite else "nil"
-    expr = _lisp_concat(
-        _MCP_DICT_LISP_LIB,
-        f"(mcp-xrecord-set {_lisp_string(dict_name)} {_lisp_string(key)} {values_expr} {ow})\n",
-    )
-    obj = _run_lisp_json(ctx, expr)
+    obj = _run_dict_lisp_json(ctx, _dict_xrecord_set_call(dict_name, key, values, overwrite))
     return _strip_ok(obj)
 
 
@@ -1119,15 +1441,7 @@ def dict_xrecord_delete(ctx: Context, dict_name: str, key: str) -> Dict[str, Any
     """Delete an XRecord entry from a named dictionary."""
 
     _ensure_connected()
-    if not dict_name:
-        raise ValueError("dict_name must be non-empty")
-    if not key:
-        raise ValueError("key must be non-empty")
-    expr = _lisp_concat(
-        _MCP_DICT_LISP_LIB,
-        f"(mcp-xrecord-delete {_lisp_string(dict_name)} {_lisp_string(key)})\n",
-    )
-    obj = _run_lisp_json(ctx, expr)
+    obj = _run_dict_lisp_json(ctx, _dict_xrecord_delete_call(dict_name, key))
     return _strip_ok(obj)
 
 
@@ -1136,14 +1450,42 @@ def dict_delete(ctx: Context, dict_name: str, recursive: bool = True) -> Dict[st
     """Delete a named dictionary from the Named Objects Dictionary."""
 
     _ensure_connected()
-    if not dict_name:
-        raise ValueError("dict_name must be non-empty")
-    rec = "T" if recursive else "nil"
-    expr = _lisp_concat(_MCP_DICT_LISP_LIB, f"(mcp-dict-delete {_lisp_string(dict_name)} {rec})\n")
-    obj = _run_lisp_json(ctx, expr)
+    obj = _run_dict_lisp_json(ctx, _dict_delete_call(dict_name, recursive))
     return _strip_ok(obj)
 
 
+@mcp.tool()
+def dict_batch(ctx: Context, operations: List[Dict[str, Any]], timeout_sec: float = 10.0) -> Dict[str, Any]:
+    """Run several dict_* operations in one AutoCAD round-trip.
+
+    Each operation is {"op": "<dict tool name>", ...that tool's arguments}.
+    Returns {"results": [...]} in order; each result keeps its "ok" flag.
+    """
+
+    _ensure_connected()
+    if not isinstance(operations, list):
+        raise ValueError("operations must be a list")
+    calls: List[str] = []
+    for i, op in enumerate(operations):
+        if not isinstance(op, dict):
+            raise ValueError(f"operations[{i}] must be an object")
+        args = dict(op)
+        name = args.pop("op", None)
+        build = _DICT_OP_CALLS.get(str(name))
+        if build is None:
+            raise ValueError(f"operations[{i}].op must be one of: {', '.join(_DICT_OP_CALLS)}")
+        try:
+            calls.append(build(**args))
+        except TypeError as e:
+            raise ValueError(f"operations[{i}]: {e}")
+    if not calls:
+        return {"results": []}
+    results = _run_with_dict_lib(
+        ctx, lambda c, e: _run_lisp_json_many(c, e, len(calls), timeout_sec=timeout_sec), _lisp_progn(calls)
+    )
+    return {"results": results}
+
+
 @mcp.tool()
 def selection(
     ctx: Context,
@@ -1158,24 +1500,21 @@ def selection(
     """
 
     _ensure_connected()
-    dwg = state.bridge.get_dwg_label()
+    dwg = _cached_dwg_label()
 
-    temp_stream_id = _ensure_logfile_stream(ctx)
-    try:
+    with _shared_logfile_stream(ctx):
         stream = state.streams.get_default()
         if not stream:
             raise RuntimeError("No default stream")
 
         mo = int(max_objects) if max_objects is not None else -1
+        lib_key = _lisp_lib_key()
 
         # 1) Try implied (PickFirst) selection.
-        req_id1 = str(uuid.uuid4())
+        req_id1 = _new_id()
         cursor0 = int(stream.cursor)
-        expr1 = _lisp_concat(
-            _MCP_SELECTION_LISP_LIB,
-            f"(mcp-selection-implied-lite {_lisp_string(req_id1)} {mo})\n",
-        )
-        r1 = send_command(ctx, expr1, wait=True, timeout_sec=min(10.0, float(timeout_sec)))
+        expr1 = _selection_expr(f"(mcp-selection-implied-lite {_lisp_string(req_id1)} {mo})\n", lib_key)
+        r1 = _send_command_impl(expr1, wait=True, timeout_sec=min(10.0, float(timeout_sec)), dwg=dwg)
         log_block1 = r1.get("log") or {}
         initial_text1 = str(log_block1.get("text") or "")
         cursor1 = log_block1.get("cursor")
@@ -1187,6 +1526,8 @@ def selection(
             cursor=int(cursor1) if cursor1 is not None else cursor0,
         )
         out1["dwg"] = dwg
+        # A reply proves the library is defined; a timeout may mean it is not.
+        _mark_lisp_lib(_MCP_SELECTION_LISP_FPS, None if out1.get("timed_out") else lib_key)
         state.audit.log(
             "selection",
             {
@@ -1210,17 +1551,17 @@ def selection(
         if cmdactive != 0:
             raise RuntimeError(f"AutoCAD is busy (CMDACTIVE={cmdactive}); cannot prompt for selection")
 
-        req_id2 = str(uuid.uuid4())
+        req_id2 = _new_id()
         prompt_expr = _lisp_string(prompt) if prompt else "nil"
         filter_expr = _lisp_typed_values(filter) if filter is not None else "nil"
 
-        expr2 = _lisp_concat(
-            _MCP_SELECTION_LISP_LIB,
+        expr2 = _selection_expr(
             f"(mcp-selection-prompt-lite {_lisp_string(req_id2)} {prompt_expr} {filter_expr} {mo})\n",
+            lib_key,
         )
 
         # Critical: interactive ssget must be the last input in this SendCommand.
-        r2 = send_command(ctx, expr2, wait=False, timeout_sec=0.1)
+        r2 = _send_command_impl(expr2, wait=False, timeout_sec=0.1, dwg=dwg)
         log_block2 = r2.get("log") or {}
         initial_text2 = str(log_block2.get("text") or "")
         cursor2 = log_block2.get("cursor")
@@ -1232,6 +1573,8 @@ def selection(
             cursor=int(cursor2) if cursor2 is not None else int(out1.get("cursor") or stream.cursor),
         )
         out2["dwg"] = dwg
+        if not out2.get("timed_out"):
+            _mark_lisp_lib(_MCP_SELECTION_LISP_FPS, lib_key)
         state.audit.log(
             "selection",
             {
@@ -1247,17 +1590,14 @@ def selection(
             dwg=dwg,
         )
         return out2
-    finally:
-        if temp_stream_id:
-            try:
-                stop_logging(ctx, temp_stream_id)
-            except Exception:
-                pass
 
 
 def main() -> None:
     # Run MCP over stdio (FastMCP default)
-    mcp.run()
+    try:
+        mcp.run()
+    finally:
+        state.audit.close()
 
 
 if __name__ == "__main__":
@@ -1,14 +1,59 @@
-import json
+import atexit
 import os
+import queue
 import threading
 import time
 from dataclasses import dataclass
-from datetime import datetime, timezone
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional, Tuple
+
+from ._jsonfast import dumps_line
+
+
+# Group commit: queued records are appended at most this often, or as soon as
+# _FLUSH_RECORDS are waiting. Past _MAX_PENDING records are dropped (counted
+# in SessionLogger.dropped) rather than growing without bound.
+_FLUSH_RECORDS = 256
+_MAX_PENDING = 10_000
+
+_OPEN_FLAGS = os.O_WRONLY | os.O_APPEND | os.O_CREAT | getattr(os, "O_BINARY", 0)
+
+
+def _flush_interval_sec() -> float:
+    raw = (os.environ.get("AUTOCAD_MCP_AUDIT_FLUSH_MS") or "").strip()
+    try:
+        ms = float(raw) if raw else 50.0
+    except ValueError:
+        ms = 50.0
+    return max(1.0, ms) / 1000.0
+
+
+_FLUSH_INTERVAL_SEC = _flush_interval_sec()
+
+
+# (unix second, "YYYY-MM-DDTHH:MM:SS") of the last formatted timestamp.
+_iso_sec_cache: Tuple[int, str] = (-1, "")
+
+
+def _iso_from_ns(ns: int) -> str:
+    """UTC ISO-8601 with milliseconds, same shape as datetime.isoformat(timespec="milliseconds")."""
+
+    global _iso_sec_cache
+    sec, ms = divmod(ns // 1_000_000, 1000)
+    cached = _iso_sec_cache
+    if cached[0] == sec:
+        head = cached[1]
+    else:
+        tm = time.gmtime(sec)
+        head = (
+            f"{tm.tm_year:04d}-{tm.tm_mon:02d}-{tm.tm_mday:02d}"
+            f"T{tm.tm_hour:02d}:{tm.tm_min:02d}:{tm.tm_sec:02d}"
+        )
+        _iso_sec_cache = (sec, head)
+    return f"{head}.{ms:03d}+00:00"
 
 
 def iso_now() -> str:
-    return datetime.now(timezone.utc).isoformat(timespec="milliseconds")
+    return _iso_from_ns(time.time_ns())
 
 
 @dataclass
@@ -19,19 +64,120 @@ class SessionLogger:
     def __post_init__(self) -> None:
         os.makedirs(os.path.dirname(self.path), exist_ok=True)
         self._lock = threading.Lock()
+        # Serializes drains so batches land in the order they were taken.
+        self._io_lock = threading.Lock()
+        # Opened on the first flush and kept for the life of the logger.
+        self._fd: Optional[int] = None
+        # Serialized records. Encoding stays on the caller's thread so a
+        # payload is captured as it was when logged and bad payloads raise there.
+        self._q: "queue.SimpleQueue[bytes]" = queue.SimpleQueue()
+        self.dropped = 0
+        # Records lost to failed appends, and the last such error.
+        self.write_errors = 0
+        self.last_write_error: Optional[str] = None
+        self._wake = threading.Event()
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+        # session_id never changes: encode it once and splice it into each
+        # record between "ts" and the per-event tail.
+        self._sid_part = b'","session_id":' + dumps_line(self.session_id)[:-1] + b","
+        atexit.register(self.close)
+
+    def log(self, event: str, payload: Dict[str, Any], *, dwg: Optional[str] = None, durable: bool = False) -> None:
+        pending = self._q.qsize()
+        if pending >= _MAX_PENDING and not (self._closed or durable):
+            self.dropped += 1
+            return
+        self._q.put(self._encode(event, payload, dwg))
+        if self._thread is None and not self._closed:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._flush_loop, name="acad-cmd-audit", daemon=True)
+                    self._thread.start()
+        if self._closed:
+            try:
+                self.flush(sync=True)
+            finally:
+                self._close_fd()
+        elif durable:
+            self.flush(sync=True)
+        elif pending + 1 >= _FLUSH_RECORDS:
+            self._wake.set()
+
+    def _encode(self, event: str, payload: Dict[str, Any], dwg: Optional[str]) -> bytes:
+        tail = dumps_line({"event": event, "dwg": dwg, "payload": payload})
+        return b'{"ts":"' + iso_now().encode("ascii") + self._sid_part + tail[1:]
 
-    def log(self, event: str, payload: Dict[str, Any], *, dwg: Optional[str] = None) -> None:
-        row = {
-            "ts": iso_now(),
-            "session_id": self.session_id,
-            "event": event,
-            "dwg": dwg,
-            "payload": payload,
+    def stats(self) -> Dict[str, Any]:
+        """Audit health counters (records dropped when the queue was full, failed appends)."""
+
+        return {
+            "dropped": self.dropped,
+            "write_errors": self.write_errors,
+            "last_write_error": self.last_write_error,
         }
-        line = json.dumps(row, ensure_ascii=True)
-        with self._lock:
-            with open(self.path, "a", encoding="utf-8") as f:
-                f.write(line + "\n")
-                f.flush()
-        # Best-effort: give AutoCAD/COM some breathing room
-        time.sleep(0)
+
+    def flush(self, *, sync: bool = False) -> None:
+        """Append all queued records to the log file (and fsync if `sync`).
+
+        A failed append is counted in write_errors; with `sync` the OSError is
+        also raised to the caller.
+        """
+
+        with self._io_lock:
+            lines: List[bytes] = []
+            get = self._q.get_nowait
+            while True:
+                try:
+                    lines.append(get())
+                except queue.Empty:
+                    break
+            if not lines:
+                return
+            try:
+                if self._fd is None:
+                    self._fd = os.open(self.path, _OPEN_FLAGS, 0o644)
+                view = memoryview(b"".join(lines))
+                while view:
+                    view = view[os.write(self._fd, view) :]
+                if sync:
+                    os.fsync(self._fd)
+            except OSError as e:
+                self.write_errors += len(lines)
+                self.last_write_error = f"{type(e).__name__}: {e}"
+                if sync:
+                    raise
+
+    def _close_fd(self) -> None:
+        with self._io_lock:
+            if self._fd is not None:
+                try:
+                    os.close(self._fd)
+                except OSError:
+                    pass
+                self._fd = None
+
+    def close(self) -> None:
+        """Stop the background flusher and drain the queue.
+
+        If records were dropped, a final "audit_dropped" record says how many.
+        """
+
+        if self._closed:
+            return
+        if self.dropped:
+            self._q.put(self._encode("audit_dropped", {"dropped": self.dropped}, None))
+        self._closed = True
+        self._wake.set()
+        try:
+            self.flush(sync=True)
+        except OSError:
+            # Already counted in write_errors; nothing left to report to at exit.
+            pass
+        self._close_fd()
+
+    def _flush_loop(self) -> None:
+        while not self._closed:
+            self._wake.wait(_FLUSH_INTERVAL_SEC)
+            self._wake.clear()
+            self.flush()
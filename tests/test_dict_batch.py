@@ -0,0 +1,52 @@
+import unittest
+from unittest import mock
+
+try:
+    from acad_cmd import server
+except ImportError as e:  # mcp / pywin32 are only available on the Windows host
+    raise unittest.SkipTest(f"server dependencies not installed: {e}")
+
+
+class DictBatchTest(unittest.TestCase):
+    def setUp(self) -> None:
+        patcher = mock.patch.object(server, "_ensure_connected")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _run(self, operations, results):
+        sent = []
+
+        def fake_run_with_dict_lib(ctx, run, call):
+            sent.append(call)
+            return results
+
+        with mock.patch.object(server, "_run_with_dict_lib", side_effect=fake_run_with_dict_lib):
+            out = server.dict_batch(None, operations)
+        return out, sent
+
+    def test_operations_run_in_one_envelope_in_order(self) -> None:
+        results = [{"ok": True, "dicts": []}, {"ok": False, "error": "missing"}]
+        out, sent = self._run(
+            [{"op": "dict_list"}, {"op": "dict_xrecord_get", "dict_name": "D", "key": "k"}],
+            results,
+        )
+        self.assertEqual(out, {"results": results})
+        self.assertEqual(len(sent), 1)
+        envelope = sent[0]
+        self.assertTrue(envelope.startswith("(progn "))
+        self.assertLess(envelope.index("(mcp-dict-list)"), envelope.index("(mcp-xrecord-get "))
+
+    def test_empty_batch_sends_nothing(self) -> None:
+        out, sent = self._run([], [])
+        self.assertEqual(out, {"results": []})
+        self.assertEqual(sent, [])
+
+    def test_invalid_operations_are_rejected_before_sending(self) -> None:
+        for ops in ([{"op": "nope"}], [{"op": "dict_keys"}], [{"op": "dict_keys", "dict_name": ""}], ["dict_list"]):
+            with self.subTest(ops=ops):
+                with self.assertRaises(ValueError):
+                    self._run(ops, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
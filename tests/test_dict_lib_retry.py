@@ -0,0 +1,92 @@
+import contextlib
+import unittest
+from unittest import mock
+
+try:
+    from acad_cmd import server
+except ImportError as e:  # mcp / pywin32 are only available on the Windows host
+    raise unittest.SkipTest(f"server dependencies not installed: {e}")
+
+
+KEY = (1, "C:\\drawings\\a.dwg")
+SET_CALL = server._dict_xrecord_set_call("D", "k", [{"code": 1, "value": "v"}], overwrite=False)
+
+
+class RunWithDictLibTest(unittest.TestCase):
+    def setUp(self) -> None:
+        for target, kwargs in (
+            ("_lisp_lib_key", {"return_value": KEY}),
+            ("_shared_logfile_stream", {"side_effect": lambda ctx: contextlib.nullcontext()}),
+        ):
+            patcher = mock.patch.object(server, target, **kwargs)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        saved = dict(server.state.lisp_libs)
+        self.addCleanup(lambda: (server.state.lisp_libs.clear(), server.state.lisp_libs.update(saved)))
+        server.state.lisp_libs.clear()
+
+    def _mark_loaded(self) -> None:
+        server.state.lisp_libs[server._MCP_DICT_LISP_LIB_FP] = KEY
+
+    def _loaded(self) -> bool:
+        return server._lisp_lib_loaded(server._MCP_DICT_LISP_LIB_FP, KEY)
+
+    def test_first_call_sends_library_and_marks_it(self) -> None:
+        sent = []
+        result = server._run_with_dict_lib(None, lambda ctx, expr: sent.append(expr) or {"ok": True}, SET_CALL)
+        self.assertEqual(result, {"ok": True})
+        self.assertEqual(len(sent), 1)
+        self.assertIn("(defun mcp--emit-json", sent[0])
+        self.assertTrue(self._loaded())
+
+    def test_missing_output_is_not_retried(self) -> None:
+        # Late output / timeout: the mutating call may already have run.
+        self._mark_loaded()
+        run = mock.Mock(side_effect=server._McpJsonMissing("late"))
+        with self.assertRaises(server._McpJsonMissing):
+            server._run_with_dict_lib(None, run, SET_CALL)
+        self.assertEqual(run.call_count, 1)
+        self.assertNotIn("(defun mcp--emit-json", run.call_args[0][1])
+
+    def test_guarded_call_resends_only_when_library_is_gone(self) -> None:
+        self._mark_loaded()
+        run = mock.Mock(side_effect=[server._McpLibMissing("gone"), {"ok": True}])
+        self.assertEqual(server._run_with_dict_lib(None, run, SET_CALL), {"ok": True})
+        self.assertEqual(run.call_count, 2)
+        first, second = (c[0][1] for c in run.call_args_list)
+        self.assertIn("(boundp 'mcp--emit-json)", first)
+        self.assertIn("(defun mcp--emit-json", second)
+        self.assertTrue(self._loaded())
+
+    def test_lisp_error_marks_library_loaded(self) -> None:
+        run = mock.Mock(side_effect=server._McpLispError("Key already exists"))
+        with self.assertRaises(server._McpLispError):
+            server._run_with_dict_lib(None, run, SET_CALL)
+        self.assertEqual(run.call_count, 1)
+        self.assertTrue(self._loaded())
+
+    def test_other_failures_do_not_mark_library_loaded(self) -> None:
+        run = mock.Mock(side_effect=RuntimeError("Lost connection to AutoCAD while waiting for idle"))
+        with self.assertRaises(RuntimeError):
+            server._run_with_dict_lib(None, run, SET_CALL)
+        self.assertEqual(run.call_count, 1)
+        self.assertFalse(self._loaded())
+
+    def test_batch_runs_mutations_once(self) -> None:
+        self._mark_loaded()
+        sent = []
+
+        def fake_many(ctx, expr, count, *, timeout_sec=10.0):
+            sent.append(expr)
+            raise server._McpJsonMissing("late")
+
+        with mock.patch.object(server, "_ensure_connected"), mock.patch.object(
+            server, "_run_lisp_json_many", side_effect=fake_many
+        ):
+            with self.assertRaises(server._McpJsonMissing):
+                server.dict_batch(None, [{"op": "dict_delete", "dict_name": "D"}, {"op": "dict_list"}])
+        self.assertEqual(len(sent), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+import contextlib
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+try:
+    from acad_cmd import server
+except ImportError as e:  # mcp / pywin32 are only available on the Windows host
+    raise unittest.SkipTest(f"server dependencies not installed: {e}")
+
+from acad_cmd.output_log import OutputStreamManager
+
+
+STALE = b'[MCP:JSON]{"ok":true,"stale":true}\n'
+
+
+class OwnLispOutputTest(unittest.TestCase):
+    def test_cuts_at_own_start_line(self) -> None:
+        r = {"marker_id": "7", "log": {"text": '[MCP:JSON]{"old":1}\n[MCP:LISP id=7 start]\n[MCP:JSON]{"ok":true}\n'}}
+        self.assertEqual(server._own_lisp_output(r), '\n[MCP:JSON]{"ok":true}\n')
+
+    def test_stale_marker_without_start_line_is_dropped(self) -> None:
+        r = {"marker_id": "8", "log": {"text": '[MCP:JSON]{"old":1}\n[MCP:LISP id=7 start]\n'}}
+        self.assertEqual(server._own_lisp_output(r), "")
+        self.assertEqual(server._own_lisp_output({"marker_id": "8"}), "")
+
+
+class RunLispJsonTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.path = os.path.join(self._tmp.name, "acad.log")
+        with open(self.path, "wb") as f:
+            f.write(STALE)
+        self.mgr = OutputStreamManager(self._tmp.name)
+        self.mgr.start_logfile_stream(stream_id="s", logfile_path=self.path, cursor=0, started_by_server=True)
+        self.mgr._set_default("s")
+        self.addCleanup(self.mgr.stop, "s")
+        for target, attr, value in (
+            (server.state, "streams", self.mgr),
+            (server, "_shared_logfile_stream", lambda ctx: contextlib.nullcontext()),
+        ):
+            patcher = mock.patch.object(target, attr, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _run(self, late_output: bytes):
+        def fake_run_lisp(ctx, expr, *, wait, timeout_sec):
+            # The returned block only holds the earlier, unread stale result;
+            # this run's own output lands in the logfile afterwards.
+            with open(self.path, "ab") as f:
+                f.write(b"[MCP:LISP id=9 start]\n" + late_output)
+            return {"marker_id": "9", "log": {"text": STALE.decode("ascii")}}
+
+        with mock.patch.object(server, "run_lisp", side_effect=fake_run_lisp):
+            return server._run_lisp_json(None, "(princ)")
+
+    def test_late_output_is_found_past_the_floor(self) -> None:
+        self.assertEqual(self._run(b'[MCP:JSON]{"ok":true,"n":1}\n'), {"ok": True, "n": 1})
+
+    def test_stale_marker_before_the_run_is_rejected(self) -> None:
+        with self.assertRaises(server._McpJsonMissing):
+            self._run(b"; error: bad argument type\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,129 @@
+import os
+import tempfile
+import unittest
+
+from acad_cmd.output_log import OutputStreamManager
+
+
+class _LogfileTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.dir = self._tmp.name
+        self.path = os.path.join(self.dir, "acad.log")
+        with open(self.path, "wb") as f:
+            f.write(b"line one\nline two\n")
+        self.mgr = OutputStreamManager(self.dir)
+
+    def tearDown(self) -> None:
+        for sid in ("a", "b"):
+            self.mgr.stop(sid)
+        self._tmp.cleanup()
+
+    def _start(self, stream_id: str, cursor: int = 0) -> None:
+        self.mgr.start_logfile_stream(stream_id=stream_id, logfile_path=self.path, cursor=cursor, started_by_server=True)
+
+    def _write(self, data: bytes) -> None:
+        with open(self.path, "wb") as f:
+            f.write(data)
+
+
+class ReadNewManyTest(_LogfileTestCase):
+    def test_single_stream(self) -> None:
+        self._start("a")
+        self.assertEqual(self.mgr.read_new_many([("a", 0, 1024)]), [("line one\nline two\n", 18, False)])
+
+    def test_shared_file_overlapping_ranges(self) -> None:
+        self._start("a")
+        self._start("b", cursor=9)
+        out = self.mgr.read_new_many([("a", 0, 1024), ("b", 9, 4)])
+        self.assertEqual(out[0], ("line one\nline two\n", 18, False))
+        self.assertEqual(out[1], ("line", 13, True))
+
+    def test_unknown_stream_and_empty_budget(self) -> None:
+        self._start("a")
+        self.assertEqual(self.mgr.read_new_many([("missing", 3, 10), ("a", 0, 0)]), [("", 3, False), ("", 0, False)])
+
+
+
+class ReadAllPendingTest(_LogfileTestCase):
+    def test_drains_to_end_of_file(self) -> None:
+        self._start("a")
+        self.assertEqual(self.mgr.read_all_pending("a", 0), ("line one\nline two\n", 18, False))
+        with open(self.path, "ab") as f:
+            f.write(b"three\n")
+        self.assertEqual(self.mgr.read_all_pending("a", 18), ("three\n", 24, False))
+        self.assertEqual(self.mgr.read_all_pending("a", 24), ("", 24, False))
+
+    def test_budget_caps_the_read(self) -> None:
+        self._start("a")
+        self.assertEqual(self.mgr.read_all_pending("a", 0, max_total_bytes=9), ("line one\n", 9, True))
+        # A budget that exactly reaches the end of the file left nothing behind.
+        self.assertEqual(self.mgr.read_all_pending("a", 9, max_total_bytes=9), ("line two\n", 18, False))
+
+    def test_cursor_past_end_and_unknown_stream(self) -> None:
+        self._start("a")
+        self.assertEqual(self.mgr.read_all_pending("a", 100), ("", 18, False))
+        self.assertEqual(self.mgr.read_all_pending("missing", 3), ("", 3, False))
+        self.assertEqual(self.mgr.read_all_pending("a", 0, max_total_bytes=0), ("", 0, False))
+
+
+
+class ReadFromLastMarkerTest(_LogfileTestCase):
+    def test_marker_before_min_offset_is_ignored(self) -> None:
+        self._write(b"[M]one\n[M]two\n")
+        self._start("a")
+        self.assertEqual(self.mgr.read_from_last_marker("a", b"[M]", min_offset=7), "[M]two\n")
+        self._write(b"[M]one\nno marker here\n")
+        self.assertEqual(self.mgr.read_from_last_marker("a", b"[M]", min_offset=7), "")
+        self.assertEqual(self.mgr.read_from_last_marker("a", b"[M]"), "[M]one\nno marker here\n")
+
+    def test_marker_split_across_chunk_boundary(self) -> None:
+        marker = b"[MCP:JSON]"
+        # The last 64 KiB chunk starts in the middle of the marker.
+        self._write(b"x" * 1000 + marker + b"y" * (64 * 1024 - 4))
+        self._start("a")
+        text = self.mgr.read_from_last_marker("a", marker)
+        self.assertEqual(text, "[MCP:JSON]" + "y" * (64 * 1024 - 4))
+
+
+
+class ReadNewDecodeTest(_LogfileTestCase):
+    def test_utf8_character_split_across_reads(self) -> None:
+        self.mgr._encoding = "utf-8"
+        self._write("aП b".encode("utf-8"))
+        self._start("a")
+        # The cursor moves past the partial character; the next read completes it.
+        self.assertEqual(self.mgr.read_new("a", 0, 2), ("a", 2, True))
+        self.assertEqual(self.mgr.read_new("a", 2, 10), ("П b", 5, False))
+
+    def test_cursor_jump_resets_the_decoder(self) -> None:
+        self.mgr._encoding = "utf-8"
+        self._write("aП b".encode("utf-8"))
+        self._start("a")
+        self.assertEqual(self.mgr.read_new("a", 0, 2), ("a", 2, True))
+        # The pending lead byte must not be combined with bytes from elsewhere.
+        self.assertEqual(self.mgr.read_new("a", 3, 10), (" b", 5, False))
+
+    def test_cp1251_reads(self) -> None:
+        self.mgr._encoding = "cp1251"
+        self._write("Привет".encode("cp1251"))
+        self._start("a")
+        self.assertEqual(self.mgr.read_new("a", 0, 3), ("При", 3, True))
+        self.assertEqual(self.mgr.read_new("a", 3, 3), ("вет", 6, False))
+
+    def test_truncated_only_when_capped_with_data_left(self) -> None:
+        self._start("a")
+        self.assertEqual(self.mgr.read_new("a", 0, 18), ("line one\nline two\n", 18, False))
+        self.assertEqual(self.mgr.read_new("a", 9, 100), ("line two\n", 18, False))
+        self.assertEqual(self.mgr.read_new("a", 0, 4), ("line", 4, True))
+
+    def test_decode_ascii_fast_path_and_log_encoding(self) -> None:
+        self.mgr._encoding = "cp1251"
+        self.assertEqual(self.mgr.decode(b"plain ascii\n"), "plain ascii\n")
+        self.assertEqual(self.mgr.decode("Команда".encode("cp1251")), "Команда")
+        self.mgr._encoding = "utf-8"
+        self.assertEqual(self.mgr.decode(b"bad \xff"), "bad \ufffd")
+
+
+if __name__ == "__main__":
+    unittest.main()
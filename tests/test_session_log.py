@@ -0,0 +1,69 @@
+import json
+import os
+import tempfile
+import unittest
+
+from acad_cmd.session_log import SessionLogger
+
+
+class SessionLoggerTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._tmp.name, "sess", "session.jsonl")
+        self.logger = SessionLogger(self.path, "sid-1")
+
+    def tearDown(self) -> None:
+        self.logger.close()
+        self._tmp.cleanup()
+
+    def _rows(self):
+        self.logger.flush()
+        with open(self.path, encoding="utf-8") as f:
+            return [json.loads(line) for line in f]
+
+    def test_records_keep_field_order(self) -> None:
+        self.logger.log("start_logging", {"mode": "logfile"}, dwg="a.dwg")
+        rows = self._rows()
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(list(rows[0]), ["ts", "session_id", "event", "dwg", "payload"])
+        self.assertEqual(rows[0]["session_id"], "sid-1")
+        self.assertEqual(rows[0]["payload"], {"mode": "logfile"})
+
+    def test_unserializable_payload_raises_and_is_not_written(self) -> None:
+        with self.assertRaises(TypeError):
+            self.logger.log("bad", {"obj": object()})
+        self.logger.log("good", {"n": 1})
+        self.assertEqual([r["event"] for r in self._rows()], ["good"])
+        self.assertEqual(self.logger.write_errors, 0)
+
+    def test_payload_is_captured_when_logged(self) -> None:
+        payload = {"n": 1}
+        self.logger.log("e", payload)
+        payload["n"] = 2
+        self.assertEqual(self._rows()[0]["payload"], {"n": 1})
+
+    def test_durable_record_is_on_disk_before_return(self) -> None:
+        self.logger.log("e", {}, durable=True)
+        with open(self.path, encoding="utf-8") as f:
+            self.assertEqual(len(f.readlines()), 1)
+
+    def test_failed_append_is_counted(self) -> None:
+        # After close() records are written synchronously, so the error surfaces.
+        self.logger.close()
+        os.rmdir(os.path.dirname(self.path))
+        with self.assertRaises(OSError):
+            self.logger.log("lost", {})
+        self.assertEqual(self.logger.write_errors, 1)
+        self.assertIsNotNone(self.logger.last_write_error)
+
+    def test_dropped_records_are_reported(self) -> None:
+        self.logger.dropped = 3
+        self.assertEqual(self.logger.stats()["dropped"], 3)
+        self.logger.close()
+        with open(self.path, encoding="utf-8") as f:
+            last = json.loads(f.readlines()[-1])
+        self.assertEqual((last["event"], last["payload"]), ("audit_dropped", {"dropped": 3}))
+
+
+if __name__ == "__main__":
+    unittest.main()